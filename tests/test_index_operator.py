@@ -0,0 +1,50 @@
+import unittest
+
+from yyc.utils import index_operator
+
+
+class TestVersionIndexTree(unittest.TestCase):
+
+    def setUp(self):
+        self.tree = index_operator.VersionIndexTree(None, first_idx_length=8, next_idx_length=7)
+        for index in [[19], [20], [21], [22, 3]]:
+            self.tree.add(index)
+
+    def assertInGap(self, indexes, last_index, next_index):
+        keys = index_operator.pack_index_keys([last_index] + indexes + [next_index]).tolist()
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(len(set(map(tuple, keys))), len(keys))
+        self.assertTrue(all([index[-1] > 0 for index in indexes]))
+
+    def test_allocate_many_in_one_gap(self):
+        tree = index_operator.VersionIndexTree()
+        for index in [[19], [20], [21]]:
+            tree.add(index)
+
+        # There is no free value between 20 and 21, so the allocations descend below 20.
+        allocations = []
+        for count in [1, 2, 3, 5, 7, 9, 20, 600, 1500, 30]:
+            indexes = tree.allocate([], count, 20)
+            self.assertEqual(len(indexes), count)
+            self.assertInGap(indexes, [20], [21])
+            for index in indexes:
+                self.assertNotIn(index, tree)
+                tree.add(index)
+            allocations.insert(0, indexes)
+
+        # Each allocation is located directly after 20, in front of the earlier ones.
+        ordered = sum(allocations, [])
+        self.assertInGap(ordered, [20], [21])
+        self.assertEqual(max(map(len, ordered)), 3)
+
+    def test_allocate_free_values(self):
+        # The free values are allocated at the end of the free space, directly before the next used value.
+        self.assertEqual(self.tree.allocate([], 3, None), [[16], [17], [18]])
+        self.assertEqual(self.tree.allocate([22], 2, None), [[22, 1], [22, 2]])
+        # The children of 22 are located directly after it.
+        self.assertEqual(self.tree.allocate([], 2, 22), [[22, 1], [22, 2]])
+        # There is no free value after 21, so the allocation descends below it.
+        self.assertEqual(self.tree.allocate([], 2, 21), [[21, 6], [21, 7]])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from yyc import pipeline, scheme
+
+
+class TestVersionChain(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        example_path = os.path.join(os.path.dirname(__file__), "..", "examples", "files", "version1.txt")
+        with open(example_path, "rb") as file:
+            self.text = file.read(20000)
+
+        self.paths = {}
+        for name, content in [("version1.txt", self.text), ("match.txt", self.text[9000: 9060]),
+                              ("insert.txt", b"The inserted paragraph of version 2.\n")]:
+            self.paths[name] = os.path.join(self.directory, name)
+            with open(self.paths[name], "wb") as file:
+                file.write(content)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+
+class TestScreenedVersionChain(TestVersionChain):
+
+    @staticmethod
+    def _method():
+        # The screening of this rule pairs the binary sequences out of the index order.
+        return scheme.YYC(support_bases="A", base_reference=[0, 0, 1, 1],
+                          current_code_matrix=[[1, 0, 0, 1], [0, 1, 0, 1], [1, 0, 1, 0], [0, 1, 0, 1]],
+                          search_count=100, max_homopolymer=4, max_content=0.6)
+
+    def test_encode_version2_from_screened_version1(self):
+        version1_path = os.path.join(self.directory, "version1.dna")
+        version2_path = os.path.join(self.directory, "version2.dna")
+        output_path = os.path.join(self.directory, "version2.txt")
+
+        messages = io.StringIO()
+        with contextlib.redirect_stdout(messages):
+            method = self._method()
+            pipeline.encode_original(method, self.paths["version1.txt"], version1_path)
+            statistics = method.search_statistics
+            self.assertTrue(sum(statistics["search counts"][1:]) + statistics["lower fixed"] > 0)
+
+            pipeline.encode(self._method(), ["insert"], [self.paths["insert.txt"]], [self.paths["match.txt"]],
+                            version1_path, version2_path)
+            pipeline.decode(self._method(), version2_path, output_path)
+
+        # The rows of version 2 are paired without any random generated binary sequence.
+        self.assertNotIn("Random sequence is generating!", messages.getvalue())
+
+        with open(self.paths["insert.txt"], "rb") as file:
+            expected = self.text[: 9060] + file.read() + self.text[9060:]
+        with open(output_path, "rb") as file:
+            output = file.read()
+
+        self.assertEqual(output[: len(expected)], expected)
+        self.assertEqual(output[len(expected):].strip(b"\x00"), b"")
+
+
+class TestPaddedVersionChain(TestVersionChain):
+
+    @staticmethod
+    def _method():
+        return scheme.YYC(support_bases="A", base_reference=[0, 1, 0, 1],
+                          current_code_matrix=[[1, 1, 0, 0], [1, 0, 0, 1], [1, 1, 0, 0], [1, 1, 0, 0]])
+
+    def test_match_across_empty_padding_row(self):
+        paths = {name: os.path.join(self.directory, name)
+                 for name in ["version1.dna", "version2.dna", "version3.dna", "version3.txt"]}
+        with open(self.paths["insert.txt"], "rb") as file:
+            insert = file.read()
+        # The rows of version 2 are filled to an even number by a padding row without valid data,
+        # which is located after the inserted paragraph.
+        for name, content in [("match3.txt", insert[-20:] + self.text[9060: 9080]), ("insert3.txt", b"VERSION 3")]:
+            paths[name] = os.path.join(self.directory, name)
+            with open(paths[name], "wb") as file:
+                file.write(content)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            pipeline.encode_original(self._method(), self.paths["version1.txt"], paths["version1.dna"])
+            pipeline.encode(self._method(), ["insert"], [self.paths["insert.txt"]], [self.paths["match.txt"]],
+                            paths["version1.dna"], paths["version2.dna"])
+            pipeline.encode(self._method(), ["insert"], [paths["insert3.txt"]], [paths["match3.txt"]],
+                            paths["version2.dna"], paths["version3.dna"])
+            pipeline.decode(self._method(), paths["version3.dna"], paths["version3.txt"])
+
+        expected = self.text[: 9060] + insert + self.text[9060: 9080] + b"VERSION 3" + self.text[9080:]
+        with open(paths["version3.txt"], "rb") as file:
+            output = file.read()
+
+        self.assertEqual(output[: len(expected)], expected)
+        self.assertEqual(output[len(expected):].strip(b"\x00"), b"")
+
+
+class TestGapVersionChain(TestVersionChain):
+
+    @staticmethod
+    def _method():
+        return scheme.YYC(support_bases="A", base_reference=[0, 1, 0, 1],
+                          current_code_matrix=[[1, 1, 0, 0], [1, 0, 0, 1], [1, 1, 0, 0], [1, 1, 0, 0]])
+
+    def test_many_inserts_in_one_gap(self):
+        paths = {name: os.path.join(self.directory, name) for name in ["version1.dna", "version2.dna", "version2.txt"]}
+        # The match ends with the row 599 (15 bytes in each row), so all the inserts are located between
+        # the rows 599 and 600, which have no free index between them.
+        inserts = [("Insert " + str(number) + ". ").encode() * (1 + 7 * number) for number in range(6)]
+        for number, content in enumerate([self.text[8940: 9000]] + inserts):
+            paths[number] = os.path.join(self.directory, str(number) + ".txt")
+            with open(paths[number], "wb") as file:
+                file.write(content)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            pipeline.encode_original(self._method(), self.paths["version1.txt"], paths["version1.dna"])
+            pipeline.encode(self._method(), ["insert"] * len(inserts), [paths[number + 1] for number in range(6)],
+                            [paths[0]] * len(inserts), paths["version1.dna"], paths["version2.dna"])
+            pipeline.decode(self._method(), paths["version2.dna"], paths["version2.txt"])
+
+        # Each insert is located directly after the match, so the later one is in front of the earlier ones.
+        expected = self.text[: 9000] + b"".join(reversed(inserts)) + self.text[9000:]
+        with open(paths["version2.txt"], "rb") as file:
+            output = file.read()
+
+        self.assertEqual(output[: len(expected)], expected)
+        self.assertEqual(output[len(expected):].strip(b"\x00"), b"")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import unittest
+
+from yyc.utils import validity
+
+# The stub of RNAfold, which records the sequences folded by each process and returns (- the count of G / 10).
+_stub_source = """#!{executable}
+import os
+import sys
+
+log_path = os.path.join({directory!r}, "fold_%d.log" % os.getpid())
+for line in sys.stdin:
+    sequence = line.strip()
+    with open(log_path, "a") as file:
+        file.write(sequence + "\\n")
+    sys.stdout.write(sequence + "\\n" + "." * len(sequence) + " (%6.2f)\\n" % (-sequence.count("G") / 10.0))
+    sys.stdout.flush()
+"""
+
+
+class FoldStubTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.executable = os.path.join(self.directory, "RNAfold")
+        with open(self.executable, "w") as file:
+            file.write(_stub_source.format(executable=sys.executable, directory=self.directory))
+        os.chmod(self.executable, os.stat(self.executable).st_mode | stat.S_IXUSR)
+
+    def tearDown(self):
+        validity.set_fold_pool()
+        validity.set_fold_cache()
+        shutil.rmtree(self.directory)
+
+    def folded(self):
+        """
+        Get the sequences folded by each stub process, in the order of the processes.
+        """
+        results = []
+        for name in sorted(os.listdir(self.directory)):
+            if name.startswith("fold_"):
+                with open(os.path.join(self.directory, name)) as file:
+                    results.append(file.read().split())
+
+        return results
+
+
+class TestFoldPool(FoldStubTestCase):
+
+    def test_energies_in_order(self):
+        with validity.FoldPool(1, self.executable) as pool:
+            self.assertEqual(pool.energies(["AGGA", "TTTT", "GGGG"]), [-0.2, 0.0, -0.4])
+            self.assertEqual(pool.energies(["GATC"]), [-0.1])
+
+        # The sequences of both batches are folded by the same long-lived process.
+        self.assertEqual(self.folded(), [["AGGA", "TTTT", "GGGG", "GATC"]])
+
+    def test_split_across_workers(self):
+        motifs = ["G" * count + "A" * (8 - count) for count in range(8)]
+        with validity.FoldPool(3, self.executable) as pool:
+            energies = pool.energies(motifs)
+
+        self.assertEqual(energies, [-count / 10.0 for count in range(8)])
+        self.assertEqual(sorted(self.folded()), sorted([motifs[0: 3], motifs[3: 6], motifs[6: 8]]))
+
+    def test_close(self):
+        pool = validity.set_fold_pool(2, self.executable)
+        self.assertEqual(validity.batch_fold(["GGGG", "AAAA"], -0.3), [True, False])
+
+        processes = [worker.process for worker in pool.workers]
+        self.assertTrue(all([process is not None and process.poll() is None for process in processes]))
+        pool.close()
+        self.assertTrue(all([worker.process is None for worker in pool.workers]))
+        self.assertTrue(all([process.poll() is not None for process in processes]))
+
+    def test_missing_executable(self):
+        with validity.FoldPool(1, os.path.join(self.directory, "missing")) as pool:
+            self.assertEqual(pool.energies(["ACGT"]), [None])
+
+
+class TestFoldCache(FoldStubTestCase):
+
+    def test_eviction_order(self):
+        cache = validity.FoldCache(capacity=3)
+        cache.put_all([("A", 59.1, -1.0), ("C", 59.1, -2.0), ("G", 59.1, -3.0)])
+        self.assertEqual(cache.get("A", 59.1), -1.0)
+
+        # "C" is the least recently used one after "A" is read.
+        cache.put_all([("T", 59.1, -4.0)])
+        self.assertEqual(list(cache.memory), [("G", 59.1), ("A", 59.1), ("T", 59.1)])
+        cache.put_all([("CC", 59.1, -5.0), ("GG", 59.1, -6.0)])
+        self.assertEqual(list(cache.memory), [("T", 59.1), ("CC", 59.1), ("GG", 59.1)])
+
+        self.assertIsNone(cache.get("C", 59.1))
+        self.assertIsNone(cache.get("T", 37.0))
+        self.assertEqual(cache.statistics()["hits"], 1)
+        self.assertEqual(cache.statistics()["misses"], 2)
+        self.assertEqual(len(cache), 3)
+
+    def test_persistence(self):
+        path = os.path.join(self.directory, "energies.db")
+        cache = validity.FoldCache(capacity=1, path=path)
+        cache.put_all([("ACGT", 59.1, -1.5), ("GGCC", 59.1, -2.5)])
+        # The evicted free energy is still read from the database.
+        self.assertEqual(cache.get("ACGT", 59.1), -1.5)
+        cache.close()
+
+        cache = validity.FoldCache(path=path)
+        self.assertEqual(cache.get("GGCC", 59.1), -2.5)
+        self.assertIsNone(cache.get("GGCC", 37.0))
+        self.assertEqual(cache.statistics()["hits"], 1)
+        self.assertEqual(cache.statistics()["misses"], 1)
+        cache.close()
+
+    def test_fold_unseen_only(self):
+        path = os.path.join(self.directory, "energies.db")
+        validity.set_fold_pool(1, self.executable)
+        validity.set_fold_cache(path=path)
+        self.assertEqual(validity.free_energies(["GGAA", "AAAA", "GGAA"]), [-0.2, 0.0, -0.2])
+
+        # The cache of the next run is loaded from the same database.
+        cache = validity.set_fold_cache(path=path)
+        self.assertEqual(validity.free_energies(["AAAA", "GGGA", "GGAA"]), [0.0, -0.3, -0.2])
+
+        self.assertEqual(self.folded(), [["GGAA", "AAAA", "GGGA"]])
+        self.assertEqual(cache.statistics()["hits"], 2)
+        self.assertEqual(cache.statistics()["misses"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,4 @@
-import copy
+import os
 import sys
 import math
 from yyc.utils import log, data_handle, index_operator, model_saver
@@ -7,7 +7,8 @@ import numpy as np
 
 # noinspection PyProtectedMember
 def encode_original(method, input_path, output_path,
-                    model_path=None, verify=None, need_index=True, payload_length=120, need_log=False):
+                    model_path=None, verify=None, need_index=True, payload_length=120, need_log=False,
+                    batch_size=None, workers=1):
     """
     Use the selected method, convert the original version file to DNA sequences and output the DNA sequences to a file.
 
@@ -37,6 +38,13 @@ def encode_original(method, input_path, output_path,
 
     :param need_log: show the log.
     :type: bool
+
+    :param batch_size: the number of binary segments processed at one time in the streaming mode.
+                       If it is None, the whole file is read, indexed and encoded at one time.
+    :type: int
+
+    :param workers: the number of worker processes for encoding in parallel.
+    :type: int
     """
 
     if input_path is None or len(input_path) == 0:
@@ -47,15 +55,34 @@ def encode_original(method, input_path, output_path,
         log.output(log.ERROR, str(__name__), str(sys._getframe().f_code.co_name),
                    "The output file path is invalid!")
 
-    input_matrix, size = data_handle.read_binary_from_all(input_path, payload_length, need_log)
+    if batch_size is not None:
+        if verify is not None:
+            log.output(log.ERROR, str(__name__), str(sys._getframe().f_code.co_name),
+                       "The error correction method is not supported in the streaming mode!")
+
+        total_count = math.ceil(os.path.getsize(input_path) * 8 / payload_length)
+        binary_batches = data_handle.read_binary_batches(input_path, payload_length, batch_size, need_log)
+        if need_index:
+            binary_batches = index_operator.connect_batches(binary_batches, need_log)
+
+        dna_batches = method.encode_stream(binary_batches, total_count, need_log, workers)
+        data_handle.write_dna_batches(output_path, dna_batches, need_log)
+
+        # The model is saved after encoding, with the search statistics of the method.
+        if model_path is not None:
+            model_saver.save_model(model_path, {"method": method, "verify": verify})
+        return
+
+    input_matrix, size = data_handle.read_binary_array_from_all(input_path, payload_length, need_log)
 
     if need_index:
         input_matrix = index_operator.connect_all(input_matrix, need_log)
 
+    # the rows of the array are encoded directly, only the error correction method needs the lists
     if verify is not None:
-        input_matrix = verify.add_for_matrix(input_matrix, need_log)
+        input_matrix = verify.add_for_matrix(input_matrix.tolist(), need_log)
 
-    dna_sequences = method.encode(input_matrix, need_log)
+    dna_sequences = method.encode(input_matrix, need_log, workers)
 
     if model_path is not None:
         model_saver.save_model(model_path, {"method": method, "verify": verify})
@@ -66,7 +93,7 @@ def encode_original(method, input_path, output_path,
 # noinspection PyProtectedMember
 def encode(method, modifications, modified_files, match_files, last_version_dnas_path, output_path, need_index=True,
            segment_length=140, first_idx_length=20, next_idx_length=14, zero_mark=22, limit_next_index_num=6,
-           need_log=False):
+           need_log=False, workers=1, index_sidecar=False, offset_sidecar=False):
     """
     Use the selected method, encode the current version file based on the dna file of the last version and output the
     dna file of current version.
@@ -114,35 +141,69 @@ def encode(method, modifications, modified_files, match_files, last_version_dnas
 
     :param need_log: show the log.
     :type: bool
+
+    :param workers: the number of worker processes for decoding the last version and encoding in parallel.
+    :type: int
+
+    :param index_sidecar: whether load the index tree from the sidecar of the last version DNA file (".tree"),
+                          and save the index tree of the current version as the sidecar of the output file.
+    :type: bool
+
+    :param offset_sidecar: whether load the line-offset index of the last version DNA file from its sidecar (".idx"),
+                           and save it there if the sidecar is missing or out of date.
+    :type: bool
     """
 
-    _, last_version_dnas = data_handle.read_dna_file(last_version_dnas_path, need_log)
-    last_version_matrix, size = method.decode(last_version_dnas, need_log)
+    with data_handle.open_dna_file(last_version_dnas_path, need_log, offset_sidecar) as last_version_dnas:
+        last_version_matrix, size = method.decode(last_version_dnas, need_log, workers)
     # print(last_version_matrix)
 
     # identify the 'xxxx' to minor index, such as "20-1-1"
-    last_version_binary_indexes, last_version_data_set, last_version_indexes = \
-        index_operator.divide_all_version(last_version_matrix, need_log)
-    new_version_dnas = copy.deepcopy(last_version_matrix)
+    last_version = index_operator.parse_all_version(last_version_matrix, need_log, first_idx_length, next_idx_length)
+
+    # the screened pairing may not follow the index order, so the rows are restored in order of index,
+    # and the two rows decoded from one DNA sequence are found by their positions instead of the parity
+    order = index_operator.index_order(last_version.keys)
+    partners = index_operator.pair_partners(order)
+    last_version_matrix = [last_version_matrix[row] for row in order.tolist()]
+    last_version = index_operator.parse_all_version(last_version_matrix, False, first_idx_length, next_idx_length)
+
+    # the free gaps between the used indexes, for allocating the minor indexes
+    index_tree = None
+    if index_sidecar:
+        index_tree = index_operator.VersionIndexTree.load(last_version_dnas_path, first_idx_length, next_idx_length)
+    if index_tree is None:
+        index_tree = index_operator.VersionIndexTree(last_version, first_idx_length, next_idx_length)
+    # the rows of the last version superseded by the modifications, and the rows generated by them
+    superseded_rows = bytearray(len(last_version_matrix))
+    modified_version_dnas = []
+    # the rows newly superseded by the current modification, in the order of marking
+    modification_rows = []
+
+    def supersede(row):
+        if not superseded_rows[row]:
+            superseded_rows[row] = 1
+            modification_rows.append(row)
+        index_tree.discard(last_version.index(row))
 
-    last_version_idx_len = {}
-    last_version_binary_string = ""
     valid_last_version_data_set = []
-    cur_sum_count = 0
-    for idx, data in enumerate(last_version_data_set):
+    for idx in range(len(last_version)):
+        data = last_version.data(idx)
         if data[:15] == '0'*15:
             print(data[:15])
             need_extract = int('0b' + data[15:zero_mark], 2)
-            valid_data = data[-need_extract:]
+            # the row without valid data (need_extract is 0) must be empty instead of data[-0:]
+            valid_data = data[len(data) - need_extract:]
         else:
             valid_data = data
 
-        cur_sum_count += len(valid_data)
         valid_last_version_data_set.append(valid_data)
-        last_version_idx_len[idx] = [cur_sum_count, len(valid_data)]
-        last_version_binary_string += "".join([str(d) for d in valid_data])
 
-    last_version_data_set = copy.deepcopy(valid_last_version_data_set)
+    last_version_data_set = valid_last_version_data_set
+    # the bit offsets of the valid data of each row in the last version
+    payload_offsets = index_operator.PayloadOffsets(map(len, last_version_data_set))
+    # the packed bits of the valid data of the last version, for locating the match files
+    last_version_bytes = last_version.pack_data(list(map(len, last_version_data_set)))
     print(modifications)
 
     for idx, modification in enumerate(modifications):
@@ -158,269 +219,254 @@ def encode(method, modifications, modified_files, match_files, last_version_dnas
         match_file = match_files[idx]
         print(match_file)
         if match_file != "":
-            match_binary_string, match_size = data_handle.read_binary_string_from_all(match_file, need_log)
+            with open(match_file, mode="rb") as file:
+                match_bytes = file.read()
         else:
-            match_binary_string = False
+            match_bytes = False
 
         # match to obtain the modified start dna index
         additional_binary = {'head': '', 'end': ''}
-        if match_binary_string:
-            match_start_str = last_version_binary_string.index(match_binary_string)
-            for idx, temp in last_version_idx_len.items():
-                str_count = temp[0]
-                if str_count < match_start_str + 1:
-                    pass
-                else:
-                    match_start_dna = idx
-                    break
-            match_end_str = match_start_str + len(match_binary_string) - 1
+        del modification_rows[:]
+        if match_bytes:
+            match_start_str = index_operator.find_packed(last_version_bytes, match_bytes)
+            if match_start_str < 0:
+                log.output(log.ERROR, str(__name__), str(sys._getframe().f_code.co_name),
+                           "The content of match file " + match_file + " cannot be found in the last version!")
+            match_end_str = match_start_str + len(match_bytes) * 8 - 1
 
             # get last_index, next_index, additional_binary
             additional_binary = {'head': '', 'end': ''}
             last_index = False
             next_index = False
-            last_binary_index = False
-            next_binary_index = False
-            for idx, temp in enumerate(list(last_version_idx_len.values())[match_start_dna:]):
-                sum_count = temp[0]
-                if sum_count < match_end_str + 1:
-                    pass
-                elif sum_count == match_end_str + 1:
-                    match_end_dna = match_start_dna + idx
-                    if (match_end_dna + 1) % 2 == 0:
-                        if modification == 'insert':
-                            if match_end_dna >= 0:
-                                last_index = last_version_indexes[match_end_dna]
-                                last_binary_index = last_version_binary_indexes[match_end_dna]
-                            if match_end_dna < len(last_version_indexes) - 1:
-                                next_index = last_version_indexes[match_end_dna + 1]
-                                next_binary_index = last_version_binary_indexes[match_end_dna + 1]
+            match_end_dna, _ = payload_offsets.locate(match_end_str)
+            sum_count = payload_offsets.end(match_end_dna)
+            if sum_count == match_end_str + 1:
+                if partners[match_end_dna] != match_end_dna + 1:
+                    if modification == 'insert':
+                        if match_end_dna >= 0:
+                            last_index = last_version.index(match_end_dna)
+                        if match_end_dna < len(last_version) - 1:
+                            next_index = last_version.index(match_end_dna + 1)
 
+                    else:
+                        if modification == 'delete':
+                            modified_end_str = match_end_str + len(modified_binary_string)
                         else:
-                            if modification == 'delete':
-                                modified_end_str = match_end_str + len(modified_binary_string)
-                            else:
-                                modified_end_str = match_end_str + len(modified_binary_string['delete'])
-
-                            for id, x in enumerate(list(last_version_idx_len.values())[match_end_dna + 1:]):
-                                count = x[0]
-                                modified_end_dna = match_end_dna + id + 1
-                                new_version_dnas.remove(last_version_matrix[modified_end_dna])
-                                if count < modified_end_str + 1:
-                                    pass
-                                elif count == modified_end_str + 1:
-                                    break
-                                else:
-                                    additional_count = count - (modified_end_str + 1)
-                                    additional_string_right = \
-                                        last_version_data_set[modified_end_dna][-additional_count:]
-                                    additional_binary['end'] = additional_string_right
-                                    break
-
-                            if (modified_end_dna - match_end_dna) % 2 == 0:
-                                if match_end_dna >= 0:
-                                    last_index = last_version_indexes[match_end_dna]
-                                    last_binary_index = last_version_binary_indexes[match_end_dna]
-                                if modified_end_dna < len(last_version_indexes) - 1:
-                                    next_index = last_version_indexes[modified_end_dna + 1]
-                                    next_binary_index = last_version_binary_indexes[modified_end_dna + 1]
+                            modified_end_str = match_end_str + len(modified_binary_string['delete'])
+
+                        for modified_end_dna in range(match_end_dna + 1, len(payload_offsets)):
+                            count = payload_offsets.end(modified_end_dna)
+                            supersede(modified_end_dna)
+                            if count < modified_end_str + 1:
                                 pass
+                            elif count == modified_end_str + 1:
+                                break
                             else:
-                                if modified_end_dna < len(last_version_data_set) - 1:
-                                    additional_binary['end'] = additional_binary['end'] \
-                                                               + last_version_data_set[modified_end_dna + 1]
-                                    new_version_dnas.remove(last_version_matrix[modified_end_dna + 1])
-                                if match_end_dna >= 0:
-                                    last_index = last_version_indexes[match_end_dna]
-                                    last_binary_index = last_version_binary_indexes[match_end_dna]
-                                if modified_end_dna < len(last_version_indexes) - 2:
-                                    next_index = last_version_indexes[modified_end_dna + 2]
-                                    next_binary_index = last_version_binary_indexes[modified_end_dna + 2]
-                    else:
-                        additional_binary['head'] = last_version_data_set[match_end_dna]
-                        new_version_dnas.remove(last_version_matrix[match_end_dna])
-                        if modification == 'insert':
-                            if match_end_dna + 1 <= len(last_version_data_set) - 1:
-                                additional_binary['end'] = last_version_data_set[match_end_dna + 1]
-                                new_version_dnas.remove(last_version_matrix[match_end_dna + 1])
+                                additional_count = count - (modified_end_str + 1)
+                                additional_string_right = \
+                                    last_version_data_set[modified_end_dna][-additional_count:]
+                                additional_binary['end'] = additional_string_right
+                                break
 
-                            if match_end_dna > 0:
-                                last_index = last_version_indexes[match_end_dna - 1]
-                                last_binary_index = last_version_binary_indexes[match_end_dna - 1]
-                            if match_end_dna < len(last_version_indexes) - 2:
-                                next_index = last_version_indexes[match_end_dna + 2]
-                                next_binary_index = last_version_binary_indexes[match_end_dna + 2]
+                        if partners[modified_end_dna] != modified_end_dna + 1:
+                            if match_end_dna >= 0:
+                                last_index = last_version.index(match_end_dna)
+                            if modified_end_dna < len(last_version) - 1:
+                                next_index = last_version.index(modified_end_dna + 1)
+                            pass
                         else:
-                            if modification == 'delete':
-                                modified_end_str = match_end_str + len(modified_binary_string)
-                            else:
-                                modified_end_str = match_end_str + len(modified_binary_string['delete'])
-
-                            for id, x in enumerate(list(last_version_idx_len.values())[match_end_dna+1:]):
-                                count = x[0]
-                                modified_end_dna = match_end_dna + id + 1
-                                new_version_dnas.remove(last_version_matrix[modified_end_dna])
-                                if count < modified_end_str + 1:
-                                    pass
-                                elif count == modified_end_str + 1:
-                                    break
-                                else:
-                                    additional_count = count - (modified_end_str + 1)
-                                    additional_string_right = \
-                                        last_version_data_set[modified_end_dna][-additional_count:]
-                                    additional_binary['end'] = additional_string_right
-                                    # new_version_dnas.remove(last_version_dnas[modified_end_dna])
-                                    break
-
-                            if (modified_end_dna - match_end_dna) % 2 == 1:
-                                # additional_binary.append(len(additional_binary[0])*'0')
-                                # 需要additional_binary最终添加索引后变成偶数
-                                if match_end_dna > 0:
-                                    last_index = last_version_indexes[match_end_dna - 1]
-                                    last_binary_index = last_version_binary_indexes[match_end_dna - 1]
-                                if modified_end_dna < len(last_version_indexes) - 1:
-                                    next_index = last_version_indexes[modified_end_dna + 1]
-                                    next_binary_index = last_version_binary_indexes[modified_end_dna + 1]
+                            if modified_end_dna < len(last_version_data_set) - 1:
+                                additional_binary['end'] = additional_binary['end'] \
+                                                           + last_version_data_set[modified_end_dna + 1]
+                                supersede(modified_end_dna + 1)
+                            if match_end_dna >= 0:
+                                last_index = last_version.index(match_end_dna)
+                            if modified_end_dna < len(last_version) - 2:
+                                next_index = last_version.index(modified_end_dna + 2)
+                else:
+                    additional_binary['head'] = last_version_data_set[match_end_dna]
+                    supersede(match_end_dna)
+                    if modification == 'insert':
+                        if match_end_dna + 1 <= len(last_version_data_set) - 1:
+                            additional_binary['end'] = last_version_data_set[match_end_dna + 1]
+                            supersede(match_end_dna + 1)
+
+                        if match_end_dna > 0:
+                            last_index = last_version.index(match_end_dna - 1)
+                        if match_end_dna < len(last_version) - 2:
+                            next_index = last_version.index(match_end_dna + 2)
+                    else:
+                        if modification == 'delete':
+                            modified_end_str = match_end_str + len(modified_binary_string)
+                        else:
+                            modified_end_str = match_end_str + len(modified_binary_string['delete'])
+
+                        for modified_end_dna in range(match_end_dna + 1, len(payload_offsets)):
+                            count = payload_offsets.end(modified_end_dna)
+                            supersede(modified_end_dna)
+                            if count < modified_end_str + 1:
                                 pass
+                            elif count == modified_end_str + 1:
+                                break
                             else:
-                                if modified_end_dna < len(last_version_data_set) - 1:
-                                    additional_binary['end'] = additional_binary['end'] \
-                                                               + last_version_data_set[modified_end_dna + 1]
-                                    new_version_dnas.remove(last_version_matrix[modified_end_dna + 1])
-                                if match_end_dna > 0:
-                                    last_index = last_version_indexes[match_end_dna - 1]
-                                    last_binary_index = last_version_binary_indexes[match_end_dna - 1]
-                                if modified_end_dna + 1 < len(last_version_indexes) - 1:
-                                    next_index = last_version_indexes[modified_end_dna + 2]
-                                    next_binary_index = last_version_binary_indexes[modified_end_dna + 2]
-                    break
+                                additional_count = count - (modified_end_str + 1)
+                                additional_string_right = \
+                                    last_version_data_set[modified_end_dna][-additional_count:]
+                                additional_binary['end'] = additional_string_right
+                                # new_version_dnas.remove(last_version_dnas[modified_end_dna])
+                                break
+
+                        if partners[modified_end_dna] != modified_end_dna + 1:
+                            # additional_binary.append(len(additional_binary[0])*'0')
+                            # 需要additional_binary最终添加索引后变成偶数
+                            if match_end_dna > 0:
+                                last_index = last_version.index(match_end_dna - 1)
+                            if modified_end_dna < len(last_version) - 1:
+                                next_index = last_version.index(modified_end_dna + 1)
+                            pass
+                        else:
+                            if modified_end_dna < len(last_version_data_set) - 1:
+                                additional_binary['end'] = additional_binary['end'] \
+                                                           + last_version_data_set[modified_end_dna + 1]
+                                supersede(modified_end_dna + 1)
+                            if match_end_dna > 0:
+                                last_index = last_version.index(match_end_dna - 1)
+                            if modified_end_dna + 1 < len(last_version) - 1:
+                                next_index = last_version.index(modified_end_dna + 2)
 
-                else:
-                    match_end_dna = match_start_dna + idx
-                    additional_count = sum_count - (match_end_str + 1)
-                    additional_string_left = last_version_data_set[match_end_dna][:-additional_count]
-                    additional_string_right = last_version_data_set[match_end_dna][-additional_count:]
-                    if (match_end_dna + 1) % 2 == 0:
-                        additional_binary['head'] = last_version_data_set[match_end_dna - 1] + additional_string_left
+            else:
+                additional_count = sum_count - (match_end_str + 1)
+                additional_string_left = last_version_data_set[match_end_dna][:-additional_count]
+                additional_string_right = last_version_data_set[match_end_dna][-additional_count:]
+                if partners[match_end_dna] == match_end_dna - 1:
+                    additional_binary['head'] = last_version_data_set[match_end_dna - 1] + additional_string_left
 
-                        new_version_dnas.remove(last_version_matrix[match_end_dna - 1])
-                        new_version_dnas.remove(last_version_matrix[match_end_dna])
+                    supersede(match_end_dna - 1)
+                    supersede(match_end_dna)
 
-                        if modification == 'insert':
-                            additional_binary['end'] = additional_string_right
+                    if modification == 'insert':
+                        additional_binary['end'] = additional_string_right
 
-                            if match_end_dna - 2 >= 0:
-                                last_index = last_version_indexes[match_end_dna - 2]
-                                last_binary_index = last_version_binary_indexes[match_end_dna - 2]
-                            if match_end_dna < len(last_version_indexes) - 1:
-                                next_index = last_version_indexes[match_end_dna + 1]
-                                next_binary_index = last_version_binary_indexes[match_end_dna + 1]
+                        if match_end_dna - 2 >= 0:
+                            last_index = last_version.index(match_end_dna - 2)
+                        if match_end_dna < len(last_version) - 1:
+                            next_index = last_version.index(match_end_dna + 1)
 
+                    else:
+                        if modification == 'delete':
+                            modified_end_str = match_end_str + len(modified_binary_string)
                         else:
-                            if modification == 'delete':
-                                modified_end_str = match_end_str + len(modified_binary_string)
-                            else:
-                                modified_end_str = match_end_str + len(modified_binary_string['delete'])
-
-                            for id, x in enumerate(list(last_version_idx_len.values())[match_end_dna:]):
-                                count = x[0]
-                                modified_end_dna = match_end_dna + id
-
-                                if id > 0:
-                                    new_version_dnas.remove(last_version_matrix[modified_end_dna])
-                                if count < modified_end_str + 1:
-                                    pass
-                                elif count == modified_end_str + 1:
-                                    break
-                                else:
-                                    additional_count = count - (modified_end_str + 1)
-                                    additional_string_right = \
-                                        last_version_data_set[modified_end_dna][-additional_count:]
-                                    additional_binary['end'] = additional_string_right
-                                    break
-                            if (modified_end_dna - match_end_dna) % 2 == 1:
-                                if modified_end_dna < len(last_version_data_set) - 1:
-                                    additional_binary['end'] = additional_binary['end'] \
-                                                               + last_version_data_set[modified_end_dna + 1]
-                                    new_version_dnas.remove(last_version_matrix[modified_end_dna + 1])
-                                if match_end_dna - 2 >= 0:
-                                    last_index = last_version_indexes[match_end_dna - 2]
-                                    last_binary_index = last_version_binary_indexes[match_end_dna - 2]
-                                if modified_end_dna + 1 < len(last_version_indexes) - 1:
-                                    next_index = last_version_indexes[modified_end_dna + 2]
-                                    next_binary_index = last_version_binary_indexes[modified_end_dna + 2]
+                            modified_end_str = match_end_str + len(modified_binary_string['delete'])
+
+                        for modified_end_dna in range(match_end_dna, len(payload_offsets)):
+                            count = payload_offsets.end(modified_end_dna)
+
+                            if modified_end_dna > match_end_dna:
+                                supersede(modified_end_dna)
+                            if count < modified_end_str + 1:
                                 pass
+                            elif count == modified_end_str + 1:
+                                break
                             else:
-                                if match_end_dna - 2 >= 0:
-                                    last_index = last_version_indexes[match_end_dna - 2]
-                                    last_binary_index = last_version_binary_indexes[match_end_dna - 2]
-                                if modified_end_dna < len(last_version_indexes) - 1:
-                                    next_index = last_version_indexes[modified_end_dna + 1]
-                                    next_binary_index = last_version_binary_indexes[modified_end_dna + 1]
-                    else:
-                        additional_binary['head'] = additional_string_left
-                        new_version_dnas.remove(last_version_matrix[match_end_dna])
-
-                        if modification == 'insert':
-                            additional_binary['end'] = additional_string_right
-                            if match_end_dna + 1 <= len(last_version_data_set) - 1:
+                                additional_count = count - (modified_end_str + 1)
+                                additional_string_right = \
+                                    last_version_data_set[modified_end_dna][-additional_count:]
+                                additional_binary['end'] = additional_string_right
+                                break
+                        if partners[modified_end_dna] == modified_end_dna + 1:
+                            if modified_end_dna < len(last_version_data_set) - 1:
                                 additional_binary['end'] = additional_binary['end'] \
-                                                           + last_version_data_set[match_end_dna + 1]
-                                new_version_dnas.remove(last_version_matrix[match_end_dna + 1])
-                            if match_end_dna - 1 >= 0:
-                                last_index = last_version_indexes[match_end_dna - 1]
-                                last_binary_index = last_version_binary_indexes[match_end_dna - 1]
-                            if match_end_dna + 1 < len(last_version_indexes) - 1:
-                                next_index = last_version_indexes[match_end_dna + 2]
-                                next_binary_index = last_version_binary_indexes[match_end_dna + 2]
+                                                           + last_version_data_set[modified_end_dna + 1]
+                                supersede(modified_end_dna + 1)
+                            if match_end_dna - 2 >= 0:
+                                last_index = last_version.index(match_end_dna - 2)
+                            if modified_end_dna + 1 < len(last_version) - 1:
+                                next_index = last_version.index(modified_end_dna + 2)
+                            pass
+                        else:
+                            if match_end_dna - 2 >= 0:
+                                last_index = last_version.index(match_end_dna - 2)
+                            if modified_end_dna < len(last_version) - 1:
+                                next_index = last_version.index(modified_end_dna + 1)
+                else:
+                    additional_binary['head'] = additional_string_left
+                    supersede(match_end_dna)
+
+                    if modification == 'insert':
+                        additional_binary['end'] = additional_string_right
+                        next_dna = match_end_dna + 1
+                        if partners[match_end_dna] == match_end_dna + 1:
+                            additional_binary['end'] = additional_binary['end'] \
+                                                       + last_version_data_set[match_end_dna + 1]
+                            supersede(match_end_dna + 1)
+                            next_dna = match_end_dna + 2
+                        if match_end_dna - 1 >= 0:
+                            last_index = last_version.index(match_end_dna - 1)
+                        if next_dna < len(last_version):
+                            next_index = last_version.index(next_dna)
 
+                    else:
+                        if modification == 'delete':
+                            modified_end_str = match_end_str + len(modified_binary_string)
                         else:
-                            if modification == 'delete':
-                                modified_end_str = match_end_str + len(modified_binary_string)
-                            else:
-                                modified_end_str = match_end_str + len(modified_binary_string['delete'])
-
-                            for id, x in enumerate(list(last_version_idx_len.values())[match_end_dna:]):
-                                count = x[0]
-                                modified_end_dna = match_end_dna + id
-                                if id > 0:
-                                    new_version_dnas.remove(last_version_matrix[modified_end_dna])
-                                if count < modified_end_str + 1:
-                                    pass
-                                elif count == modified_end_str + 1:
-                                    break
-                                else:
-                                    additional_count = count - (modified_end_str + 1)
-                                    additional_string_right = \
-                                        last_version_data_set[modified_end_dna][-additional_count:]
-                                    additional_binary['end'] = additional_string_right
-                                    break
-                            if (modified_end_dna - match_end_dna) % 2 == 1:
-                                if match_end_dna > 0:
-                                    last_index = last_version_indexes[match_end_dna - 1]
-                                    last_binary_index = last_version_binary_indexes[match_end_dna - 1]
-                                if modified_end_dna < len(last_version_indexes) - 1:
-                                    next_index = last_version_indexes[modified_end_dna + 1]
-                                    next_binary_index = last_version_binary_indexes[modified_end_dna + 1]
+                            modified_end_str = match_end_str + len(modified_binary_string['delete'])
+
+                        for modified_end_dna in range(match_end_dna, len(payload_offsets)):
+                            count = payload_offsets.end(modified_end_dna)
+                            if modified_end_dna > match_end_dna:
+                                supersede(modified_end_dna)
+                            if count < modified_end_str + 1:
                                 pass
+                            elif count == modified_end_str + 1:
+                                break
                             else:
-                                if modified_end_dna < len(last_version_data_set) - 1:
-                                    additional_binary['end'] = additional_binary['end'] \
-                                                               + last_version_data_set[modified_end_dna + 1]
-                                    new_version_dnas.remove(last_version_matrix[modified_end_dna + 1])
-                                if match_end_dna > 0:
-                                    last_index = last_version_indexes[match_end_dna - 1]
-                                    last_binary_index = last_version_binary_indexes[match_end_dna - 1]
-                                if modified_end_dna + 1 < len(last_version_indexes) - 1:
-                                    next_index = last_version_indexes[modified_end_dna + 2]
-                                    next_binary_index = last_version_binary_indexes[modified_end_dna + 2]
-                    break
+                                additional_count = count - (modified_end_str + 1)
+                                additional_string_right = \
+                                    last_version_data_set[modified_end_dna][-additional_count:]
+                                additional_binary['end'] = additional_string_right
+                                break
+                        if partners[modified_end_dna] != modified_end_dna + 1:
+                            if match_end_dna > 0:
+                                last_index = last_version.index(match_end_dna - 1)
+                            if modified_end_dna < len(last_version) - 1:
+                                next_index = last_version.index(modified_end_dna + 1)
+                            pass
+                        else:
+                            if modified_end_dna < len(last_version_data_set) - 1:
+                                additional_binary['end'] = additional_binary['end'] \
+                                                           + last_version_data_set[modified_end_dna + 1]
+                                supersede(modified_end_dna + 1)
+                            if match_end_dna > 0:
+                                last_index = last_version.index(match_end_dna - 1)
+                            if modified_end_dna + 1 < len(last_version) - 1:
+                                next_index = last_version.index(modified_end_dna + 2)
 
         else:
+            # no index is located before the first row, so it is superseded and located after the modified part
             last_index = False
-            last_binary_index = False
-            next_index = last_version_indexes[0]
-            next_binary_index = last_version_binary_indexes[0]
+            next_index = False
+            if len(last_version) > 0 and not superseded_rows[0]:
+                additional_binary['end'] = last_version_data_set[0]
+                supersede(0)
+            if len(last_version) > 1:
+                next_index = last_version.index(1)
+
+        # the partner of a superseded row is kept if it is not adjacent in the index order,
+        # so one more adjacent row is superseded to keep the number of superseded rows even
+        if len(modification_rows) % 2 == 1:
+            first_row, last_row = min(modification_rows), max(modification_rows)
+            if last_row + 1 < len(last_version) and not superseded_rows[last_row + 1]:
+                additional_binary['end'] = additional_binary['end'] + last_version_data_set[last_row + 1]
+                supersede(last_row + 1)
+                next_index = False
+                if last_row + 2 < len(last_version):
+                    next_index = last_version.index(last_row + 2)
+            elif first_row > 0 and not superseded_rows[first_row - 1]:
+                additional_binary['head'] = last_version_data_set[first_row - 1] + additional_binary['head']
+                supersede(first_row - 1)
+                last_index = False
+                if first_row > 1:
+                    last_index = last_version.index(first_row - 2)
 
         if modification == 'replace':
             binary_string = additional_binary['head'] + modified_binary_string['insert'] + additional_binary['end']
@@ -433,316 +479,45 @@ def encode(method, modifications, modified_files, match_files, last_version_dnas
         end_remainder = add_end_length % 8
         modified_binary_lst = []
         if need_index:
-            limited_idx_num = pow(2, next_idx_length - 4) - 1
-            if last_index and next_index:
-                if len(last_index) > len(next_index):
-                    first_unequal = len(next_index)
-                    for i in range(len(next_index)):
-                        if last_index[i] != next_index[i]:
-                            first_unequal = i
-                            break
-                else:
-                    first_unequal = len(last_index)
-                    for i in range(len(last_index)):
-                        if last_index[i] != next_index[i]:
-                            first_unequal = i
-                            break
-                internal = len(last_index) - first_unequal - 1
-                if internal == 0:
-                    need_zero = 0
-                    add_next_idx = [last_index[-1]+1]
-                    next_idx_num = len(last_index) - 1
-                    payload_length = segment_length - (next_idx_num * next_idx_length + first_idx_length)
-                    modified_count = math.ceil(len(binary_string) / payload_length)
-                    last_next_diff = next_index[len(last_index) - 1] - last_index[len(last_index) - 1]
-                    if modified_count+last_index[-1]+3 >= last_next_diff:
-                        need_zero = 1
-                        add_next_idx = [last_index[-1], 1]
-                        next_idx_num = len(last_index) - 1 + 1
-                        payload_length = segment_length - (next_idx_num * next_idx_length + first_idx_length)
-                        modified_count = math.ceil(len(binary_string) / payload_length)
-                        if modified_count+3 > limited_idx_num * last_next_diff:
-                            need_zero = 2
-                            add_next_idx = [1, 1]
-                            next_idx_num = len(last_index) - 1 + 2
-                            payload_length = segment_length - (next_idx_num * next_idx_length + first_idx_length)
-                            modified_count = math.ceil(len(binary_string) / payload_length)
-                            if math.ceil((modified_count+3) / limited_idx_num) > limited_idx_num:
-                                raise Exception("Need more number of next index!")
-
-                elif internal == 1:
-                    need_zero = 0
-                    add_next_idx = [last_index[-2], last_index[-1]+1]
-                    next_idx_num = len(last_index) - 1
-                    payload_length = segment_length - (next_idx_num * next_idx_length + first_idx_length)
-                    modified_count = math.ceil(len(binary_string) / payload_length)
-                    last_next_diff = next_index[len(last_index)-2] - last_index[-2]
-                    if modified_count + last_index[-1] + 3 > limited_idx_num * last_next_diff:
-                        need_zero = 1
-                        add_next_idx = [1, last_index[-1]+1]
-                        next_idx_num = len(last_index) - 1 + 1
-                        payload_length = segment_length - (next_idx_num * next_idx_length + first_idx_length)
-                        modified_count = math.ceil(len(binary_string) / payload_length)
-                        if math.ceil((modified_count + last_index[-1] - 1 + 3) / limited_idx_num) > limited_idx_num:
-                            raise Exception("Need more number of next index!")
-
-                else:
-                    need_zero = 0
-                    add_next_idx = [last_index[-2], last_index[-1]+1]
-                    next_idx_num = len(last_index) - 1
-                    payload_length = segment_length - (next_idx_num * next_idx_length + first_idx_length)
-                    modified_count = math.ceil(len(binary_string) / payload_length)
-                    if math.ceil((modified_count + last_index[-1] + 3) / limited_idx_num) > limited_idx_num - last_index[-2] + 1:
-                        raise Exception("Need more number of next index!")
-
-                if next_idx_num > limit_next_index_num:
-                    raise Exception("The number of the next index exceed its limitation!")
-                last_string_length = len(binary_string) % payload_length
-
-                if last_string_length > 0:
-                    if payload_length - last_string_length >= zero_mark:
-                        mark_num = bin(last_string_length)[2:].zfill(7)
-                        binary_string = binary_string[:-last_string_length] + 15 * '0' + mark_num \
-                                        + (payload_length - last_string_length - zero_mark) * '0' \
-                                        + binary_string[-last_string_length:]
-                        if payload_length - last_string_length > zero_mark:
-                            pass
-
-                    else:
-                        mark_num = bin(payload_length - zero_mark)[2:].zfill(7)
-                        mark_num_int = int('0b'+mark_num, 2)
-
-                        binary_string_adding = binary_string[:-last_string_length] + 15 * '0' + mark_num \
-                                               + binary_string[-last_string_length: -last_string_length+mark_num_int]
-                        remain_length = last_string_length - mark_num_int
-                        while remain_length:
-                            modified_count += 1
-                            if remain_length <= mark_num_int:
-                                mark_num = bin(remain_length)[2:].zfill(7)
-                                binary_string_adding = binary_string_adding + 15 * '0' \
-                                                       + mark_num + (mark_num_int - remain_length) * '0' \
-                                                       + binary_string[-remain_length:]
-                                remain_length = 0
-                            else:
-                                binary_string_adding = binary_string_adding + 15 * '0' + mark_num \
-                                                       + binary_string[-remain_length:-remain_length+mark_num_int]
-                                remain_length = remain_length - mark_num_int
-                        binary_string = copy.deepcopy(binary_string_adding)
-
-                if modified_count % 2 == 0:
-                    pass
-                else:
-                    binary_string = binary_string + '0' * payload_length
-                    modified_count += 1
-
-                for c in range(modified_count):
-                    if next_idx_num == len(last_index) - 1:
-                        if len(add_next_idx) == 1:
-                            if len(last_index) == 1:
-                                binary_sequence = bin(add_next_idx[0]+c)[2:].zfill(first_idx_length) \
-                                                  + binary_string[c*payload_length:(c+1)*payload_length]
-                            else:
-                                binary_sequence = last_binary_index[:-next_idx_length] + 'xxxx' \
-                                                  + bin(add_next_idx[0]+c)[2:].zfill(next_idx_length - 4) \
-                                                  + binary_string[c*payload_length:(c+1)*payload_length]
-                        elif len(add_next_idx) == 2:
-                            num = math.ceil((c + add_next_idx[-1]) / limited_idx_num) - 1
-                            final_idx = c + add_next_idx[-1] - limited_idx_num * num
-
-                            if len(last_index) == 2:
-                                binary_sequence = bin(add_next_idx[0] + num)[2:].zfill(first_idx_length) \
-                                                  + 'xxxx' + bin(final_idx)[2:].zfill(next_idx_length - 4) \
-                                                  + binary_string[c * payload_length:(c + 1) * payload_length]
-                            else:
-                                binary_sequence = last_binary_index[:-(next_idx_length*2)] + 'xxxx' \
-                                                  + bin(add_next_idx[0] + num)[2:].zfill(next_idx_length - 4) \
-                                                  + 'xxxx' + bin(final_idx)[2:].zfill(next_idx_length - 4) \
-                                                  + binary_string[c * payload_length:(c + 1) * payload_length]
-
-                    elif next_idx_num == len(last_index):
-                        if len(add_next_idx) == 1:
-                            binary_sequence = last_binary_index + 'xxxx' \
-                                              + bin(add_next_idx[0] + c)[2:].zfill(next_idx_length - 4) \
-                                              + binary_string[c * payload_length:(c + 1) * payload_length]
-                        elif len(add_next_idx) == 2:
-                            num = math.ceil((c + add_next_idx[-1]) / limited_idx_num) - 1
-                            final_idx = c + add_next_idx[-1] - limited_idx_num * num
-                            if len(last_index) == 1:
-                                binary_sequence = bin(add_next_idx[0] + num)[2:].zfill(first_idx_length) \
-                                                  + 'xxxx' + bin(final_idx)[2:].zfill(next_idx_length - 4) \
-                                                  + binary_string[c * payload_length:(c + 1) * payload_length]
-                                print(add_next_idx[0] + num, final_idx)
-                            else:
-                                binary_sequence = last_binary_index[:-next_idx_length] + 'xxxx' \
-                                                  + bin(add_next_idx[0] + num)[2:].zfill(next_idx_length - 4) \
-                                                  + 'xxxx' + bin(final_idx)[2:].zfill(next_idx_length - 4) \
-                                                  + binary_string[c * payload_length:(c + 1) * payload_length]
-
-                    elif next_idx_num == len(last_index) + 1:
-                        num = math.ceil((c + add_next_idx[-1]) / limited_idx_num) - 1
-                        final_idx = c + add_next_idx[-1] - limited_idx_num * num
-                        binary_sequence = last_binary_index + 'xxxx' \
-                                          + bin(add_next_idx[0] + num)[2:].zfill(next_idx_length - 4) \
-                                          + 'xxxx' + bin(final_idx)[2:].zfill(next_idx_length - 4) \
-                                          + binary_string[c * payload_length:(c + 1) * payload_length]
-                    modified_binary_lst.append(binary_sequence)
-
-            elif last_index:
-                payload_length = segment_length - first_idx_length
-                modified_count = math.ceil(len(binary_string) / payload_length)
-                if modified_count + 3 <= pow(2, first_idx_length-4) - 1 - last_index[0]:
-                    next_idx_num = 0
-                    add_next_idx = [last_index[0]+1]
-                else:
-                    next_idx_num = 1
-                    payload_length = segment_length - first_idx_length - next_idx_length*next_idx_num
-                    modified_count = math.ceil(len(binary_string) / payload_length)
-                    if len(last_index) == 1:
-                        add_next_idx = [last_index[0], 1]
-                    else:
-                        add_next_idx = [last_index[0], last_index[1]+1]
-                    if (modified_count + add_next_idx[-1] - 1 + 3) / limited_idx_num > \
-                            pow(2, first_idx_length) - 1 - add_next_idx[0] + 1:
-                        raise Exception("Need more number of next index!")
-
-                if len(next_idx_num) > limit_next_index_num:
-                    raise Exception("The number of the next index exceed its limitation!")
-
-                last_string_length = len(binary_string) % payload_length
-
-                if last_string_length > 0:
-                    if payload_length - last_string_length >= zero_mark:
-                        binary_string = binary_string[:-last_string_length] + binary_string[-last_string_length:] \
-                                        + (payload_length - last_string_length) * '0'
-                        if payload_length - last_string_length > zero_mark:
-                            pass
-
-                    else:
-                        mark_num = bin(payload_length - zero_mark)[2:].zfill(7)
-                        mark_num_int = int('0b' + mark_num, 2)
-                        binary_string_adding = binary_string[:-last_string_length] + 15 * '0' + mark_num \
-                                               + binary_string[-last_string_length: -last_string_length + mark_num_int]
-                        remain_length = last_string_length - mark_num_int
-
-                        while remain_length:
-                            modified_count += 1
-                            if remain_length <= mark_num_int:
-                                mark_num = bin(remain_length)[2:].zfill(7)
-                                binary_string_adding = binary_string_adding + 15 * '0' \
-                                                       + mark_num + (mark_num_int - remain_length) * '0' \
-                                                       + binary_string[-remain_length:]
-                                remain_length = 0
-                            else:
-                                binary_string_adding = binary_string_adding + 15 * '0' + mark_num \
-                                                       + binary_string[-remain_length:-remain_length + mark_num_int]
-                                remain_length = remain_length - mark_num_int
-                        binary_string = copy.deepcopy(binary_string_adding)
-
-                if modified_count % 2 == 0:
-                    pass
-                else:
-                    binary_string = binary_string + '0' * payload_length
-                    modified_count += 1
-
-                for c in range(modified_count):
-                    if next_idx_num == 0:
-                        binary_sequence = bin(c + add_next_idx[0])[2:].zfill(first_idx_length) \
-                                          + binary_string[c * payload_length:(c + 1) * payload_length]
-                        modified_binary_lst.append(binary_sequence)
-                    elif next_idx_num == 1:
-                        num = math.ceil((c + add_next_idx[-1]) / limited_idx_num) - 1
-                        final_idx = c + add_next_idx[-1] - limited_idx_num * num
-                        binary_sequence = bin(add_next_idx[0] + num)[2:].zfill(first_idx_length) \
-                                          + 'xxxx' + bin(final_idx)[2:].zfill(next_idx_length - 4) \
-                                          + binary_string[c * payload_length:(c + 1) * payload_length]
-                        modified_binary_lst.append(binary_sequence)
-
-            else:
-                need_zero = False
-                for idx, s in enumerate(next_index):
-                    s = int(s)
-                    if s > 0:
-                        need_zero = idx
-                        break
-
-                next_idx_num = need_zero + 1
-                add_next_idx = [1]
-                payload_length = segment_length - first_idx_length - next_idx_length * next_idx_num
-                modified_count = math.ceil(len(binary_string) / payload_length)
-                if modified_count + 3 > limited_idx_num:
-                    need_zero += 1
-                    next_idx_num = need_zero + 1
-                    add_next_idx = [1, 1]
-                    payload_length = segment_length - first_idx_length - next_idx_length * next_idx_num
-                    modified_count = math.ceil(len(binary_string) / payload_length)
-                    if (modified_count + 3) / limited_idx_num > limited_idx_num:
-                        raise Exception("Need more number of next index!")
-
-                if next_idx_num > limit_next_index_num:
-                    raise Exception("The number of the next index exceed its limitation!")
-                last_string_length = len(binary_string) % payload_length
-
-                if last_string_length > 0:
-                    if payload_length - last_string_length >= zero_mark:
-                        binary_string = binary_string[:-last_string_length] + binary_string[-last_string_length:] \
-                                        + (payload_length - last_string_length) * '0'
-                        if payload_length - last_string_length > zero_mark:
-                            pass
+            # the rows are located directly after the last index, or before all the indexes
+            parent, after = (last_index[:-1], last_index[-1]) if last_index else ([], None)
+            # the payload length depends on the number of minor indexes, which depends on the number of rows
+            index_num = len(index_tree.allocate(parent, 1, after)[0])
+            while True:
+                payload_length = segment_length - first_idx_length - next_idx_length * (index_num - 1)
+                padded_string, modified_count = _pad_binary_string(binary_string, payload_length, zero_mark,
+                                                                   bool(next_index))
+                indexes = index_tree.allocate(parent, modified_count, after)
+                if modified_count == 0 or len(indexes[0]) == index_num:
+                    break
+                index_num = len(indexes[0])
 
-                    else:
-                        mark_num = bin(payload_length - zero_mark)[2:].zfill(7)
-                        mark_num_int = int('0b' + mark_num, 2)
-
-                        binary_string_adding = binary_string[:-last_string_length] + 15 * '0' + mark_num \
-                                               + binary_string[-last_string_length: -last_string_length + mark_num_int]
-                        remain_length = last_string_length - mark_num_int
-                        while remain_length:
-                            modified_count += 1
-                            if remain_length <= mark_num_int:
-                                mark_num = bin(remain_length)[2:].zfill(7)
-                                binary_string_adding = binary_string_adding + 15 * '0' \
-                                                       + mark_num + (mark_num_int - remain_length) * '0' \
-                                                       + binary_string[-remain_length:]
-                                remain_length = 0
-                            else:
-                                binary_string_adding = binary_string_adding + 15 * '0' + mark_num \
-                                                       + binary_string[-remain_length:-remain_length + mark_num_int]
-                                remain_length = remain_length - mark_num_int
-                        binary_string = copy.deepcopy(binary_string_adding)
+            if index_num - 1 > limit_next_index_num:
+                log.output(log.ERROR, str(__name__), str(sys._getframe().f_code.co_name),
+                           "The number of the next index exceed its limitation!")
 
-                if modified_count % 2 == 0:
-                    pass
-                else:
-                    binary_string = binary_string + '0' * payload_length
-                    modified_count += 1
-
-                for c in range(modified_count):
-                    if len(add_next_idx) == 1:
-                        binary_sequence = bin(0)[2:].zfill(first_idx_length) + 'xxxx'\
-                                          + bin(c+1)[2:].zfill(next_idx_length - 4) \
-                                          + binary_string[c * payload_length:(c + 1) * payload_length]
-                        modified_binary_lst.append(binary_sequence)
-                    else:
-                        num = math.ceil((c + add_next_idx[-1]) / limited_idx_num) - 1
-                        final_idx = c + add_next_idx[-1] - limited_idx_num * num
-                        binary_sequence = bin(0)[2:].zfill(first_idx_length) \
-                                          + 'xxxx' + bin(num+add_next_idx[0])[2:].zfill(next_idx_length - 4) \
-                                          + 'xxxx' + bin(final_idx)[2:].zfill(next_idx_length - 4) \
-                                          + binary_string[c * payload_length:(c + 1) * payload_length]
-                        modified_binary_lst.append(binary_sequence)
+            for c, index in enumerate(indexes):
+                modified_binary_lst.append(index_operator.connect_version(
+                    index, padded_string[c * payload_length: (c + 1) * payload_length],
+                    first_idx_length, next_idx_length))
+                index_tree.add(index)
 
-        new_version_dnas = new_version_dnas + modified_binary_lst
+        modified_version_dnas.extend(modified_binary_lst)
 
-    indexs_binary, data_set, indexes, = index_operator.divide_all_version(new_version_dnas, need_log,
-                                                                          first_idx_length, next_idx_length)
+    new_version_dnas = [row for row, superseded in zip(last_version_matrix, superseded_rows) if not superseded]
+    new_version_dnas.extend(modified_version_dnas)
 
-    _, sort_binary_lst = index_operator.sort_order_version(indexes, data_set, indexs_binary, need_log)
-    dna_sequences = method.encode(sort_binary_lst, need_log)
+    new_version = index_operator.parse_all_version(new_version_dnas, need_log, first_idx_length, next_idx_length)
+    _, sort_binary_lst = index_operator.sort_order_version(new_version, need_log=need_log)
+    dna_sequences = method.encode(sort_binary_lst, need_log, workers)
     data_handle.write_dna_file(output_path, dna_sequences, need_log)
 
+    if index_sidecar:
+        index_tree.save(output_path)
+
 
 def decode(method, new_version_dnas_path, output_path, model_path=None, need_index=True,
-           first_idx_length=20, next_idx_length=14, need_log=False):
+           first_idx_length=20, next_idx_length=14, need_log=False, workers=1, offset_sidecar=False):
     """
     Use the selected method, convert DNA sequences to the original file.
 
@@ -774,13 +549,79 @@ def decode(method, new_version_dnas_path, output_path, model_path=None, need_ind
 
     :param need_log: show the log.
     :type: bool
+
+    :param workers: the number of worker processes for decoding in parallel.
+    :type: int
+
+    :param offset_sidecar: whether load the line-offset index of the DNA file from its sidecar (".idx"),
+                           and save it there if the sidecar is missing or out of date.
+    :type: bool
     """
-    _, dna_sequences = data_handle.read_dna_file(new_version_dnas_path, need_log)
-    output_binary_lst, size = method.decode(dna_sequences, need_log)
+    with data_handle.open_dna_file(new_version_dnas_path, need_log, offset_sidecar) as dna_sequences:
+        output_binary_lst, size = method.decode(dna_sequences, need_log, workers)
 
     if need_index:
-        indexs_binary, data_set, indexes = index_operator.divide_all_version(output_binary_lst, need_log,
-                                                                             first_idx_length, next_idx_length)
-        output_binary_lst, _ = index_operator.sort_order_version(indexes, data_set, indexs_binary, need_log)
+        version_indexes = index_operator.parse_all_version(output_binary_lst, need_log,
+                                                           first_idx_length, next_idx_length)
+        output_binary_lst, _ = index_operator.sort_order_version(version_indexes, need_log=need_log)
 
     data_handle.write_all_from_binary(output_path, output_binary_lst, size, need_log)
+
+
+def _pad_binary_string(binary_string, payload_length, zero_mark, need_mark):
+    """
+    Pad the binary string of a modification to an even number of rows.
+    The valid length of a partial row is kept in its zero mark ('0' * 15 + 7 bits of the valid length).
+
+    :param binary_string: the binary string of the modification.
+    :type: string
+
+    :param payload_length: the length of the data in each row.
+    :type: int
+
+    :param zero_mark: the length of the zero mark.
+    :type: int
+
+    :param need_mark: whether the zero mark is needed if the last row has enough space,
+                      it is not needed when the rows are located after all the other rows.
+    :type: bool
+
+    :return: the padded binary string and the number of rows.
+    """
+    modified_count = math.ceil(len(binary_string) / payload_length)
+    last_string_length = len(binary_string) % payload_length
+
+    if last_string_length > 0:
+        if payload_length - last_string_length >= zero_mark:
+            if need_mark:
+                mark_num = bin(last_string_length)[2:].zfill(7)
+                binary_string = binary_string[:-last_string_length] + 15 * '0' + mark_num \
+                    + (payload_length - last_string_length - zero_mark) * '0' + binary_string[-last_string_length:]
+            else:
+                binary_string = binary_string + (payload_length - last_string_length) * '0'
+
+        else:
+            mark_num = bin(payload_length - zero_mark)[2:].zfill(7)
+            mark_num_int = int('0b' + mark_num, 2)
+
+            binary_string_adding = binary_string[:-last_string_length] + 15 * '0' + mark_num \
+                + binary_string[-last_string_length: -last_string_length + mark_num_int]
+            remain_length = last_string_length - mark_num_int
+            while remain_length:
+                modified_count += 1
+                if remain_length <= mark_num_int:
+                    mark_num = bin(remain_length)[2:].zfill(7)
+                    binary_string_adding = binary_string_adding + 15 * '0' + mark_num \
+                        + (mark_num_int - remain_length) * '0' + binary_string[-remain_length:]
+                    remain_length = 0
+                else:
+                    binary_string_adding = binary_string_adding + 15 * '0' + mark_num \
+                        + binary_string[-remain_length: -remain_length + mark_num_int]
+                    remain_length = remain_length - mark_num_int
+            binary_string = binary_string_adding
+
+    if modified_count % 2 == 1:
+        binary_string = binary_string + '0' * payload_length
+        modified_count += 1
+
+    return binary_string, modified_count
@@ -1,6 +1,9 @@
 import copy
+import itertools
 import random
 import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 import math
 import numpy
@@ -11,10 +14,296 @@ import numpy as np
 
 base_index = {"A": 0, "C": 1, "G": 2, "T": 3}
 index_base = {0: "A", 1: "C", 2: "G", 3: "T"}
+_bit_characters = bytes.maketrans(b"\x00\x01", b"01")
+_base_codes = np.full(256, 255, dtype=np.uint8)
+_base_codes[[ord(base) for base in base_index]] = list(base_index.values())
+_base_characters = np.array([ord(index_base[code]) for code in range(4)], dtype=np.uint8)
+_bit_codes = np.full(256, 255, dtype=np.uint8)
+_bit_codes[[ord("0"), ord("1"), ord("x")]] = [0, 1, 2]
+# The number of columns encoded per lookup of the wide table in _synthesis_codes.
+_group_width = 4
+_wide_tables = {}
+
+
+def _same_marks(upper_list, lower_list):
+    """
+    Check whether two binary sequences can be paired, they need the same length and the same minor index marks 'x'.
+
+    :param upper_list: the upper binary sequence.
+    :type: list, string or numpy.ndarray
+
+    :param lower_list: the lower binary sequence.
+    :type: list, string or numpy.ndarray
+    """
+    if len(upper_list) != len(lower_list):
+        return False
+    if isinstance(upper_list, str) and isinstance(lower_list, str):
+        return upper_list.replace("1", "0") == lower_list.replace("1", "0")
+    if isinstance(upper_list, np.ndarray) and isinstance(lower_list, np.ndarray):
+        return True
+
+    return 'x' not in upper_list and 'x' not in lower_list
+
+
+def _bits_to_array(binary_lists, length):
+    """
+    Stack binary sequences into a uint8 array, in which 0 and 1 are the bits and 2 is the minor index mark 'x'.
+
+    :param binary_lists: binary sequences, the element is list or uint8 array of 0 and 1 (non-char)
+                         or string of '0', '1' and 'x'.
+    :type: list(list, numpy.ndarray or string)
+
+    :param length: the length of each binary sequence.
+    :type: int
+    """
+    buffer = b"".join([binary_list.encode() if isinstance(binary_list, str)
+                       else bytes(binary_list).translate(_bit_characters) for binary_list in binary_lists])
+    bits = _bit_codes[np.frombuffer(buffer, dtype=np.uint8)]
+    if np.any(bits == 255):
+        raise ValueError("Only 0, 1 and 'x' can be included in the binary sequences!")
+
+    return bits.reshape(len(binary_lists), length)
+
+
+def _sequences_to_bits(rule, dna_sequences, first_idx_length=20, next_idx_length=14):
+    """
+    Convert DNA sequences to two-line binary strings by array operations.
+    The sequences with the same length are converted together as a uint8 array of base codes.
+
+    The minor index marks 'TTTT' are at the positions first_idx_length + k * next_idx_length (k = 0, 1, ...),
+    a mark is available only if all the marks before it are available, and it is converted to 'xxxx'.
+
+    :param rule: base reference, current code matrix, support bases and support spacing of YYC.
+    :type: tuple
+
+    :param dna_sequences: the DNA sequences.
+    :type: list
+
+    :param first_idx_length: the length of the prime index.
+    :type: int
+
+    :param next_idx_length: the total length of the minor index.
+                            Note that the length of the minor index is the length of the marking plus
+                            the valid length.
+    :type: int
+
+    :return: upper binary strings and lower binary strings.
+    """
+    base_reference, current_code_matrix, support_bases, support_spacing = rule
+    dna_sequences = [dna_sequence if isinstance(dna_sequence, str) else "".join(dna_sequence)
+                     for dna_sequence in dna_sequences]
+    upper_rows, lower_rows = [None] * len(dna_sequences), [None] * len(dna_sequences)
+
+    base_reference = np.array(base_reference, dtype=np.uint8)
+    current_code_matrix = np.array(current_code_matrix, dtype=np.uint8)
+
+    groups = {}
+    for row, dna_sequence in enumerate(dna_sequences):
+        groups.setdefault(len(dna_sequence), []).append(row)
+
+    for length, rows in groups.items():
+        codes = _base_codes[np.frombuffer("".join([dna_sequences[row] for row in rows]).encode(),
+                                        dtype=np.uint8)].reshape(len(rows), length)
+        if np.any(codes == 255):
+            log.output(log.ERROR, str(__name__), str(sys._getframe().f_code.co_name),
+                       "Only A, T, C, and G can be included in the DNA sequences!")
+
+        # The support base of each position.
+        support_codes = np.empty_like(codes)
+        support_codes[:, support_spacing + 1:] = codes[:, :length - (support_spacing + 1)]
+        for col in range(min(support_spacing + 1, length)):
+            support_codes[:, col] = base_index[support_bases[col]]
+
+        upper_bits = base_reference[codes] + ord("0")
+        lower_bits = current_code_matrix[support_codes, codes] + ord("0")
+
+        # The available minor index marks are the leading 'TTTT' slots.
+        is_mark = np.ones(len(rows), dtype=bool)
+        for start in range(first_idx_length, length - 3, next_idx_length):
+            is_mark &= np.all(codes[:, start: start + 4] == 3, axis=1)
+            if not np.any(is_mark):
+                break
+            upper_bits[is_mark, start: start + 4] = ord("x")
+            lower_bits[is_mark, start: start + 4] = ord("x")
+
+        upper_string, lower_string = upper_bits.tobytes().decode(), lower_bits.tobytes().decode()
+        for index, row in enumerate(rows):
+            upper_rows[row] = upper_string[index * length: (index + 1) * length]
+            lower_rows[row] = lower_string[index * length: (index + 1) * length]
+
+    return upper_rows, lower_rows
+
+
+def _decode_bytes(chunk):
+    """
+    The task of the worker process in parallel decoding.
+
+    :param chunk: decode rule of YYC, and the bytes of DNA sequences separated by newlines.
+    :type: tuple
+
+    :return: the concatenated upper binary strings and the concatenated lower binary strings.
+    """
+    rule, sequence_bytes = chunk
+    upper_rows, lower_rows = _sequences_to_bits(rule, sequence_bytes.decode().split("\n"))
+
+    return "".join(upper_rows), "".join(lower_rows)
+
+
+def _wide_table(flat_table):
+    """
+    Build the wide table from the flat table of _synthesis_codes, which encodes _group_width columns per lookup.
+
+    :param flat_table: the code of current base, indexed by support code * 5 + pair value,
+                       the pair value is upper bit * 2 + lower bit, or 4 for the pair of marks.
+    :type: numpy.ndarray
+
+    :return: the codes of the bases in the group (one row for each column),
+             indexed by support code * 5 ^ _group_width + pair values in base 5.
+    """
+    key = flat_table.tobytes()
+    if key not in _wide_tables:
+        values = np.arange(4 * 5 ** _group_width)
+        support_codes = values // 5 ** _group_width
+        wide_table = np.empty((len(values), _group_width), dtype=np.intp)
+        for offset in range(_group_width):
+            digits = values // 5 ** (_group_width - 1 - offset) % 5
+            wide_table[:, offset] = flat_table[support_codes * 5 + digits]
+            support_codes = wide_table[:, offset]
+        _wide_tables[key] = wide_table.T.copy()
+
+    return _wide_tables[key]
+
+
+def _synthesis_codes(base_table, support_bases, support_spacing, upper_bits, lower_bits):
+    """
+    From the stacked pairs of binary sequences to the base codes of DNA sequences.
+    Each base depends on its support base, so the columns are encoded one by one, each for all the pairs.
+    When the support spacing is 0, _group_width columns are encoded per lookup of the wide table.
+
+    :param base_table: the code of current base, indexed by the code of support base, upper bit and lower bit.
+    :type: numpy.ndarray
+
+    :param support_bases: base replenishment before official data.
+    :type: string
+
+    :param support_spacing: spacing between support base and current base.
+    :type: int
+
+    :param upper_bits: the upper binary sequences from _bits_to_array.
+    :type: numpy.ndarray
+
+    :param lower_bits: the lower binary sequences from _bits_to_array.
+    :type: numpy.ndarray
+
+    :return: N x L array of base codes, one row for each pair.
+    """
+    length = upper_bits.shape[1]
+
+    # The minor index marks 'x' are encoded as T.
+    marks = upper_bits == 2
+    if np.any(marks != (lower_bits == 2)):
+        raise Exception("The adjacent binary string have different number of next index, which can not be encoded!")
+
+    # The flat table is indexed by support code * 5 + upper bit * 2 + lower bit, in which 4 is the pair of marks.
+    flat_table = np.full((4, 5), 3, dtype=np.uint8)
+    flat_table[:, :4] = np.asarray(base_table, dtype=np.uint8).reshape(4, 4)
+    flat_table = flat_table.reshape(-1)
+    pair_bits = (upper_bits.T * 2 + lower_bits.T).astype(np.intp)
+    pair_bits[marks.T] = 4
+
+    codes = np.empty(pair_bits.shape, dtype=np.uint8)
+    start = 0
+    if support_spacing == 0 and length >= _group_width:
+        # The columns are encoded group by group, each group is one lookup of the wide table.
+        wide_table = _wide_table(flat_table)
+        group_count = length // _group_width
+        groups = np.zeros((group_count, pair_bits.shape[1]), dtype=np.intp)
+        for offset in range(_group_width):
+            groups *= 5
+            groups += pair_bits[offset: group_count * _group_width: _group_width]
+
+        offsets = np.full(pair_bits.shape[1], base_index[support_bases[0]] * 5 ** _group_width, dtype=np.intp)
+        for group in range(group_count):
+            group_codes = wide_table.take(offsets + groups[group], axis=1)
+            codes[group * _group_width: (group + 1) * _group_width] = group_codes
+            offsets = group_codes[-1] * 5 ** _group_width
+        start = group_count * _group_width
+
+    for col in range(start, length):
+        if col > support_spacing:
+            support_codes = codes[col - (support_spacing + 1)].astype(np.intp)
+        else:
+            support_codes = base_index[support_bases[col]]
+        codes[col] = flat_table.take(support_codes * 5 + pair_bits[col])
+
+    return codes.T
+
+
+def _synthesis_bits(base_table, support_bases, support_spacing, upper_bits, lower_bits):
+    """
+    From the stacked pairs of binary sequences to DNA sequences, see _synthesis_codes.
+
+    :return: the concatenated DNA string of all the pairs.
+    """
+    codes = _synthesis_codes(base_table, support_bases, support_spacing, upper_bits, lower_bits)
+
+    return _base_characters[codes].tobytes().decode()
+
+
+def _pack_bits(bits):
+    """
+    Pack the stacked binary sequences from _bits_to_array for the worker processes, 8 bits per byte.
+
+    :param bits: the stacked binary sequences, in which 2 is the minor index mark 'x'.
+    :type: numpy.ndarray
+
+    :return: the packed bits, and the packed minor index marks (None if there is no mark).
+    """
+    marks = bits == 2
+    packed_marks = np.packbits(marks).tobytes() if np.any(marks) else None
+
+    return np.packbits(bits & 1).tobytes(), packed_marks
+
+
+def _unpack_bits(packed, shape):
+    """
+    Restore the stacked binary sequences packed by _pack_bits.
+
+    :param packed: the packed bits and the packed minor index marks.
+    :type: tuple
+
+    :param shape: the number and the length of the binary sequences.
+    :type: tuple
+    """
+    packed_bits, packed_marks = packed
+    count = shape[0] * shape[1]
+    bits = np.unpackbits(np.frombuffer(packed_bits, dtype=np.uint8), count=count).reshape(shape)
+    if packed_marks is not None:
+        marks = np.unpackbits(np.frombuffer(packed_marks, dtype=np.uint8), count=count).reshape(shape)
+        bits[marks == 1] = 2
+
+    return bits
+
+
+def _synthesis_bytes(chunk):
+    """
+    The task of the worker process in parallel encoding.
+
+    :param chunk: base table, support bases, support spacing, the number and the length of binary sequences,
+                  and the upper and lower binary sequences packed by _pack_bits.
+    :type: tuple
+
+    :return: the concatenated DNA string of all the pairs in the chunk.
+    """
+    base_table, support_bases, support_spacing, shape, upper_packed, lower_packed = chunk
+
+    return _synthesis_bits(base_table, support_bases, support_spacing,
+                           _unpack_bits(upper_packed, shape), _unpack_bits(lower_packed, shape))
 
 
 # noinspection PyProtectedMember
 class YYC:
+
     def __init__(
         self,
         base_reference=None,
@@ -104,6 +393,9 @@ class YYC:
 
         self.seed = seed
 
+        # Precompute the transition tables of the encoder
+        self._build_transition_tables()
+
     def _init_check(self):
         """
         The verification of initialization parameters.
@@ -174,18 +466,45 @@ class YYC:
             log.output(log.ERROR, str(__name__), str(sys._getframe().f_code.co_name),
                        "Wrong max ratio (" + str(self.max_ratio) + ")!")
 
+    def __setstate__(self, state):
+        # The models saved before the transition tables existed need to build them after loading.
+        self.__dict__.update(state)
+        if "_base_table" not in state:
+            self._build_transition_tables()
+
+    def _build_transition_tables(self):
+        """
+        Precompute the transition table used by the encoder.
+
+        base_table[support code][upper bit][lower bit] is the code of the current base.
+        The wide table of several positions per lookup is built from it and cached by _wide_table.
+        """
+        self._base_table = [[[0, 0], [0, 0]] for _ in range(4)]
+        for support_code in range(4):
+            for upper_bit in range(2):
+                current_options = [index for index in range(4) if self.base_reference[index] == upper_bit]
+                for lower_bit in range(2):
+                    if self.current_code_matrix[support_code][current_options[0]] == lower_bit:
+                        self._base_table[support_code][upper_bit][lower_bit] = current_options[0]
+                    else:
+                        self._base_table[support_code][upper_bit][lower_bit] = current_options[1]
+
     # ================================================= encode part ====================================================
 
-    def encode(self, binary_lst, need_log=False):
+    def encode(self, binary_lst, need_log=False, workers=1):
         """
         Encode DNA sequences from the binary sequences.
 
         :param binary_lst: generated binary sequences.
-                           The element of this list contains only 0 or 1 (non-char).
-        :type: list(char)
+                           The element of this list contains only 0 or 1 (non-char),
+                           the rows of the uint8 array from pipeline.encode_original can be encoded directly.
+        :type: list(char) or numpy.ndarray
 
         :param need_log: show the log.
         :type: bool
+
+        :param workers: the number of worker processes for synthesizing the DNA sequences in parallel.
+        :type: int
         """
         self.monitor.restore()
 
@@ -201,13 +520,74 @@ class YYC:
             log.output(log.NORMAL, str(__name__), str(sys._getframe().f_code.co_name),
                        "Convert to DNA sequence string set.")
 
-        dna_sequences = self._synthesis_sequences(data_set, need_log)
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                dna_sequences = self._synthesis_sequences(data_set, need_log, executor=executor, workers=workers)
+        else:
+            dna_sequences = self._synthesis_sequences(data_set, need_log)
 
         self.monitor.restore()
 
         return dna_sequences
 
-    def _adjacent_pairing(self, binary_lst, need_log):
+    def encode_stream(self, binary_batches, total_count, need_log=False, workers=1):
+        """
+        Encode DNA sequences from the binary sequences batch by batch.
+        The binary sequences which may still be searched by the fixed ones (the search window) are carried
+        to the next batch, so the DNA sequences are the same as the ones from the encode method.
+
+        :param binary_batches: iterable of generated binary sequence batches.
+        :type: iterable(list)
+
+        :param total_count: the total number of binary sequences in all the batches.
+        :type: int
+
+        :param need_log: show the log.
+        :type: bool
+
+        :param workers: the number of worker processes for synthesizing the DNA sequences in parallel.
+        :type: int
+        """
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                yield from self._encode_batches(binary_batches, total_count, need_log, executor, workers)
+        else:
+            yield from self._encode_batches(binary_batches, total_count, need_log)
+
+    def _encode_batches(self, binary_batches, total_count, need_log, executor=None, workers=1):
+        self.monitor.restore()
+
+        if need_log:
+            log.output(log.NORMAL, str(__name__), str(sys._getframe().f_code.co_name),
+                       "Pair and convert to DNA sequence string set by batch.")
+
+        random.seed(self.seed)
+        self._restore_statistics(total_count)
+
+        unpaired_lst = deque()
+        finished_count = 0
+        for binary_lst in binary_batches:
+            unpaired_lst.extend(binary_lst)
+            data_set = self._pair_unpaired(unpaired_lst, total_count, self._search_window())
+
+            if len(data_set) > 0:
+                finished_count += len(data_set)
+                if need_log:
+                    self.monitor.output(min(finished_count, total_count), total_count)
+                yield self._synthesis_sequences(data_set, False, executor=executor, workers=workers)
+
+        data_set = self._pair_unpaired(unpaired_lst, total_count)
+        if len(data_set) > 0:
+            if need_log:
+                self.monitor.output(total_count, total_count)
+            yield self._synthesis_sequences(data_set, False, executor=executor, workers=workers)
+
+        if need_log:
+            self._output_statistics()
+
+        self.monitor.restore()
+
+    def _adjacent_pairing(self, binary_lst, need_log, total_count=None):
         """
         Pair with adjacent binary sequence.
 
@@ -217,29 +597,60 @@ class YYC:
 
         :param need_log: show the log.
         :type: bool
+
+        :param total_count: the total number of binary sequences in the file,
+                            it is the length of binary_lst if the binary sequences are not paired by batch.
+        :type: int
         """
         random.seed(self.seed)
 
-        data_set = []
+        if total_count is None:
+            total_count = len(binary_lst)
+
+        self._restore_statistics(total_count)
+
+        data_set = self._pair_unpaired(deque(binary_lst), total_count)
+
+        if need_log:
+            self._output_statistics()
+
+        return data_set
+
+    def _pair_unpaired(self, unpaired_lst, total_count, keep_count=0):
+        """
+        Pair the unpaired binary sequences in order, until keep_count of them are left.
+
+        :param unpaired_lst: the unpaired binary sequences, the paired ones are removed from it.
+        :type: deque(list)
+
+        :param total_count: the total number of binary sequences in the file.
+        :type: int
 
-        total_count = len(binary_lst)
+        :param keep_count: the number of binary sequences left for the next batch.
+        :type: int
+
+        :return: the paired binary sequences, upper and lower in turn.
+        """
+        data_set = []
 
         # index_bit_length = int(len(str(bin(total_count))) - 2)
         index_bit_length = 20
 
-        search_counts = [0 for _ in range(self.search_count + 1)]
-        additional = 0
-
-        while len(binary_lst) > 0:
-            fixed_list = binary_lst[0]
-            binary_lst.remove(fixed_list)
-            another_list, is_upper, search_count = self._adjacent_searching_results(fixed_list, binary_lst,
-                                                                                    index_bit_length, total_count)
+        need_check = self._need_screening()
+        while len(unpaired_lst) > keep_count:
+            fixed_list = unpaired_lst.popleft()
+            another_list, is_upper, search_count = self._adjacent_searching_results(fixed_list, unpaired_lst,
+                                                                                    index_bit_length, total_count,
+                                                                                    need_check)
             if search_count >= 0:
-                binary_lst.remove(another_list)
-                search_counts[search_count] += 1
+                # The search count is the position of the chosen binary sequence in the unpaired ones.
+                del unpaired_lst[search_count]
+                self.search_statistics["search counts"][search_count] += 1
             else:
-                additional += 1
+                self.search_statistics["additional"] += 1
+            if not is_upper:
+                self.search_statistics["lower fixed"] += 1
+
             if is_upper:
                 data_set.append(fixed_list)
                 data_set.append(another_list)
@@ -247,60 +658,334 @@ class YYC:
                 data_set.append(another_list)
                 data_set.append(fixed_list)
 
-        results = {}
-        for index, count in enumerate(search_counts):
-            results[index] = count
-
-        if need_log:
-            log.output(log.NORMAL, str(__name__), str(sys._getframe().f_code.co_name),
-                       "Number of additional bit segment is " + str(additional)
-                       + " in original " + str(total_count) + " bit segments.")
-            log.output(log.NORMAL, str(__name__), str(sys._getframe().f_code.co_name),
-                       "In addition, the actual search counts is " + str(results))
-
         return data_set
 
     def _adjacent_searching_results(self, fixed_list, other_lists, index_length, total_count, need_check=False):
+        """
+        Search the binary sequence paired with the fixed binary sequence.
+        If need check, the first search_count unpaired binary sequences are tried in order, as the lower and then
+        as the upper one, until the DNA sequence of the pair is valid.
+        The first one is checked alone, and the others are checked together by _search_candidates.
+        If none of them is valid, the first one that has the same minor index marks is chosen.
+        The random generator is seeded by the _adjacent_pairing method.
+
+        :param fixed_list: the fixed binary sequence.
+        :type: list
 
-        random.seed(self.seed)
+        :param other_lists: the unpaired binary sequences.
+        :type: deque(list)
+
+        :param index_length: the length of the binary index.
+        :type: int
+
+        :param total_count: the total number of binary sequences.
+        :type: int
+
+        :param need_check: whether check the validity of the DNA sequence of the pair.
+        :type: bool
 
+        :return: the paired binary sequence, whether the fixed binary sequence is the upper one,
+                 and the position of the paired binary sequence in the unpaired ones (-1 means random generated).
+        """
         if len(other_lists) > 0:
-            another_list = other_lists[0]
-            n_dna, _ = self._list_to_sequence(fixed_list, another_list)
-            return another_list, True, 0
+            if not need_check:
+                return other_lists[0], True, 0
+
+            # The adjacent candidate is valid in most cases, so it is checked alone before the others.
+            for is_upper in [True, False]:
+                self.search_statistics["evaluated candidates"] += 1
+                if is_upper and self._valid_pair(fixed_list, other_lists[0]):
+                    return other_lists[0], True, 0
+                if not is_upper and self._valid_pair(other_lists[0], fixed_list):
+                    return other_lists[0], False, 0
+
+            window = min(len(other_lists), self._search_window())
+            position, is_upper = self._search_candidates(fixed_list, other_lists, 1, window)
+            if position >= 0:
+                return other_lists[position], is_upper, position
 
-            c_dna, _ = self._list_to_sequence(another_list, fixed_list)
-            return another_list, False, 0
+            self.search_statistics["invalid pairs"] += 1
+            for position in range(window):
+                if _same_marks(fixed_list, other_lists[position]):
+                    return other_lists[position], True, position
 
-        while True:
-            # insert at least tenfold interval
-            random_index = random.randint(total_count*10, math.pow(2, index_length) - 1)
-            index_list = list(map(int, list(str(bin(random_index))[2:].zfill(index_length))))
-            print("Random sequence is generating!")
+            return other_lists[0], True, 0
 
-            n_dna, random_list = self._list_to_sequence(fixed_list, index_list)
-            return random_list, True, -1
+        # insert at least tenfold interval
+        random_index = random.randint(total_count*10, math.pow(2, index_length) - 1)
+        index_list = list(map(int, list(str(bin(random_index))[2:].zfill(index_length))))
+        print("Random sequence is generating!")
 
-            c_dna, random_list = self._list_to_sequence(index_list, fixed_list)
-            return random_list, False, -1
+        n_dna, random_list = self._list_to_sequence(fixed_list, index_list)
+        return random_list, True, -1
 
-    def _synthesis_sequences(self, data_set, need_log):
+    def _need_screening(self):
+        return self.max_homopolymer != math.inf or self.max_content < 1 or self.min_free_energy is not None
+
+    def _search_window(self):
+        """
+        Get the number of unpaired binary sequences that can be searched by one fixed binary sequence.
+        """
+        if self._need_screening():
+            return max(self.search_count, 1)
+
+        return 1
+
+    def _search_candidates(self, fixed_list, other_lists, start, stop):
+        """
+        Check the candidates other_lists[start: stop] at once, each as the lower and then as the upper one.
+        The binary sequences are stacked, and the DNA sequences of all the pairs are generated column by column.
+
+        The bits before the first different one are the same in all the binary sequences (for example, the high bits
+        of the nearby indexes), so all the DNA sequences begin with the same bases.
+        If these bases are already invalid, no candidate is valid and the DNA sequences are not generated.
+
+        :param fixed_list: the fixed binary sequence.
+        :type: list or string
+
+        :param other_lists: the unpaired binary sequences.
+        :type: deque(list)
+
+        :param start: the position of the first candidate.
+        :type: int
+
+        :param stop: the position after the last candidate.
+        :type: int
+
+        :return: the position of the first valid candidate (-1 means none is valid),
+                 and whether the fixed binary sequence is the upper one.
+        """
+        length = len(fixed_list)
+        candidates = list(itertools.islice(other_lists, start, stop))
+
+        # If the candidates share the bits of the fixed binary sequence until the first violation of it paired with
+        # itself, all the pairs begin with the same invalid bases.
+        violation = self._first_violation(fixed_list, fixed_list)
+        if isinstance(fixed_list, np.ndarray):
+            # The candidates are the rows of the same uint8 array, which are stacked by their buffers.
+            bits = np.frombuffer(b"".join([fixed_list] + candidates), dtype=np.uint8).reshape(-1, length)
+            if violation >= 0 and np.all(bits[1:, :violation + 1] == bits[0, :violation + 1]):
+                self.search_statistics["prefix failures"] += 1
+                return -1, True
+
+            positions = list(range(start, start + len(candidates)))
+        else:
+            if violation >= 0:
+                prefix = list(fixed_list[:violation + 1])
+                if all([len(candidate) != length or list(candidate[:violation + 1]) == prefix
+                        for candidate in candidates]):
+                    self.search_statistics["prefix failures"] += 1
+                    return -1, True
+
+            positions = [start + offset for offset, candidate in enumerate(candidates) if len(candidate) == length]
+            bits = None
+
+        if length == 0 or len(positions) == 0:
+            return -1, True
+
+        if bits is None:
+            bits = _bits_to_array([fixed_list] + [candidates[position - start] for position in positions], length)
+        base_table = np.array(self._base_table, dtype=np.uint8)
+
+        # Only the candidates with the same minor index marks can be paired.
+        marks = bits == 2
+        rows = 1 + np.flatnonzero(np.all(marks[1:] == marks[0], axis=1))
+        if len(rows) == 0:
+            return -1, True
+        self.search_statistics["evaluated candidates"] += 2 * len(rows)
+
+        # The pairs are in the order of the tries: (fixed, candidate) and then (candidate, fixed).
+        upper_bits = np.empty((2 * len(rows), length), dtype=np.uint8)
+        lower_bits = np.empty((2 * len(rows), length), dtype=np.uint8)
+        upper_bits[0::2], upper_bits[1::2] = bits[0], bits[rows]
+        lower_bits[0::2], lower_bits[1::2] = bits[rows], bits[0]
+        codes = _synthesis_codes(base_table, self.support_bases, self.support_spacing, upper_bits, lower_bits)
+
+        valid_mask = validity.batch_check(codes, self.max_homopolymer, self.max_content)[0]
+        for pair in np.flatnonzero(valid_mask):
+            if self.min_free_energy is None \
+                    or validity.fold(_base_characters[codes[pair]].tobytes().decode(), self.min_free_energy):
+                return positions[rows[pair // 2] - 1], bool(pair % 2 == 0)
+
+        return -1, True
+
+    def _valid_pair(self, upper_list, lower_list):
+        """
+        Check the validity of the DNA sequence of the pair while its bases are generated.
+        The homopolymer and the C and G content are checked incrementally, and it stops on the first violation.
+
+        :param upper_list: the upper binary sequence.
+        :type: list or string
+
+        :param lower_list: the lower binary sequence.
+        :type: list or string
+
+        :return: whether the DNA sequence of the pair is valid.
+        """
+        codes = []
+        if self._first_violation(upper_list, lower_list, codes) >= 0:
+            return False
+
+        if self.min_free_energy is not None:
+            return validity.fold("".join([index_base[code] for code in codes]), self.min_free_energy)
+
+        return True
+
+    def _first_violation(self, upper_list, lower_list, codes=None):
+        """
+        Generate the bases of the pair until the homopolymer or the C and G content is violated.
+
+        :param upper_list: the upper binary sequence.
+        :type: list or string
+
+        :param lower_list: the lower binary sequence.
+        :type: list or string
+
+        :param codes: the list to collect the generated base codes.
+        :type: list
+
+        :return: the position of the base with the first violation, -1 means the DNA sequence is valid.
+        """
+        if len(upper_list) != len(lower_list) or len(upper_list) == 0:
+            return 0
+
+        if codes is None:
+            codes = []
+        # The bits of the array rows are compared faster as the Python integers.
+        if isinstance(upper_list, np.ndarray):
+            upper_list = upper_list.tolist()
+        if isinstance(lower_list, np.ndarray):
+            lower_list = lower_list.tolist()
+        length = len(upper_list)
+        last_code, run_length, cg_count = -1, 0, 0
+        for index, (upper_bit, lower_bit) in enumerate(zip(upper_list, lower_list)):
+            if upper_bit == 'x' or lower_bit == 'x':
+                if upper_bit != lower_bit:
+                    return index
+                current_code = 3
+            else:
+                if index > self.support_spacing:
+                    support_code = codes[index - (self.support_spacing + 1)]
+                else:
+                    support_code = base_index[self.support_bases[index]]
+                current_code = self._base_table[support_code][int(upper_bit)][int(lower_bit)]
+            codes.append(current_code)
+
+            if current_code == last_code:
+                run_length += 1
+                if run_length > self.max_homopolymer:
+                    return index
+            else:
+                last_code, run_length = current_code, 1
+
+            if current_code == 1 or current_code == 2:
+                cg_count += 1
+            if float(cg_count) / float(length) > self.max_content \
+                    or float(cg_count + length - index - 1) / float(length) < 1 - self.max_content:
+                return index
+
+        return -1
+
+    def _restore_statistics(self, total_count):
+        """
+        Restore the statistics of the pairing.
+
+        "invalid pairs" counts the pairs without a valid candidate, which fall back to the first candidate with
+        the same minor index marks, and "prefix failures" counts the ones found by the bases shared by all the
+        candidates in the search window.
+        "search counts" is the histogram of the positions of the paired binary sequences in the unpaired ones,
+        and "lower fixed" counts the pairs in which the fixed binary sequence is the lower one.
+        Only these counters are kept, so the statistics do not grow with the number of pairs.
+        """
+        self.search_statistics = {
+            "total count": total_count,
+            "evaluated candidates": 0,
+            "invalid pairs": 0,
+            "prefix failures": 0,
+            "additional": 0,
+            "search counts": [0 for _ in range(self.search_count + 1)],
+            "lower fixed": 0
+        }
+
+    def _output_statistics(self):
+        results = {}
+        for index, count in enumerate(self.search_statistics["search counts"]):
+            if count > 0:
+                results[index] = count
+
+        log.output(log.NORMAL, str(__name__), str(sys._getframe().f_code.co_name),
+                   "Number of additional bit segment is " + str(self.search_statistics["additional"])
+                   + " in original " + str(self.search_statistics["total count"]) + " bit segments.")
+        log.output(log.NORMAL, str(__name__), str(sys._getframe().f_code.co_name),
+                   "In addition, the actual search counts is " + str(results))
+        if self._need_screening():
+            statistics = self.search_statistics
+            pair_count = sum(statistics["search counts"]) + statistics["additional"]
+            fallback_rate = float(statistics["invalid pairs"]) / float(max(pair_count, 1))
+            log.output(log.NORMAL, str(__name__), str(sys._getframe().f_code.co_name),
+                       str(statistics["evaluated candidates"]) + " candidates are evaluated, and "
+                       + str(statistics["invalid pairs"]) + " pairs (fallback rate " + "%.2f" % (fallback_rate * 100)
+                       + "%) have no valid candidate, " + str(statistics["prefix failures"])
+                       + " of them are invalid in the bases shared by the search window.")
+
+    def _synthesis_sequences(self, data_set, need_log, block_size=65536, executor=None, workers=1):
         """
         Synthesis sequences by two-dimensional data set.
+        The pairs with the same length are stacked and encoded column by column for all the pairs at once.
 
         :param data_set: original data from file.
         :type: two-dimensional list(int)
 
         :param need_log: show the log.
         :type: bool
+
+        :param block_size: the number of pairs encoded together by the array operations.
+        :type: int
+
+        :param executor: the process pool which encodes the chunks of each block in parallel.
+        :type: concurrent.futures.ProcessPoolExecutor or None
+
+        :param workers: the number of worker processes in the process pool.
+        :type: int
         """
 
-        dna_sequences = []
-        for row in range(0, len(data_set), 2):
-            if need_log:
-                self.monitor.output(row + 2, len(data_set))
-            dna_sequence, _ = self._list_to_sequence(data_set[row], data_set[row + 1])
-            dna_sequences.append(dna_sequence)
+        dna_sequences = [None] * (len(data_set) // 2)
+
+        groups = {}
+        for pair in range(len(dna_sequences)):
+            upper_list, lower_list = data_set[pair * 2], data_set[pair * 2 + 1]
+            if len(upper_list) == len(lower_list):
+                groups.setdefault(len(upper_list), []).append(pair)
+            else:
+                dna_sequences[pair], _ = self._list_to_sequence(upper_list, lower_list)
+
+        base_table = np.array(self._base_table, dtype=np.uint8)
+        finished_count = len(dna_sequences) - sum([len(pairs) for pairs in groups.values()])
+        for length, pairs in groups.items():
+            for start in range(0, len(pairs), block_size):
+                block_pairs = pairs[start: start + block_size]
+                upper_bits = _bits_to_array([data_set[pair * 2] for pair in block_pairs], length)
+                lower_bits = _bits_to_array([data_set[pair * 2 + 1] for pair in block_pairs], length)
+
+                if executor is None:
+                    bases = _synthesis_bits(base_table, self.support_bases, self.support_spacing,
+                                            upper_bits, lower_bits)
+                else:
+                    # The chunks are sent to the worker processes as packed bits, and return in order.
+                    chunk_size = math.ceil(len(block_pairs) / workers)
+                    chunks = [(base_table, self.support_bases, self.support_spacing,
+                               (len(upper_bits[chunk: chunk + chunk_size]), length),
+                               _pack_bits(upper_bits[chunk: chunk + chunk_size]),
+                               _pack_bits(lower_bits[chunk: chunk + chunk_size]))
+                              for chunk in range(0, len(block_pairs), chunk_size)]
+                    bases = "".join(executor.map(_synthesis_bytes, chunks))
+
+                for index, pair in enumerate(block_pairs):
+                    dna_sequences[pair] = list(bases[index * length: (index + 1) * length])
+
+                finished_count += len(block_pairs)
+                if need_log:
+                    self.monitor.output(finished_count, len(dna_sequences))
 
         del data_set
 
@@ -320,22 +1005,29 @@ class YYC:
         dna_sequence = []
 
         if len(upper_list) == len(lower_list):
+            if 'x' not in upper_list and 'x' not in lower_list:
+                bits = _bits_to_array([upper_list, lower_list], len(upper_list))
+                bases = _synthesis_bits(np.array(self._base_table, dtype=np.uint8), self.support_bases,
+                                        self.support_spacing, bits[:1], bits[1:])
+                return list(bases), None
+
+            codes = []
             for index, (upper_bit, lower_bit) in enumerate(zip(upper_list, lower_list)):
                 if upper_bit == 'x' and lower_bit == 'x':
-                    dna_sequence.append('T')
+                    codes.append(3)
                     continue
                 if upper_bit == 'x' or lower_bit == 'x':
                     raise Exception \
                         ("The adjacent binary string have different number of next index, which can not be encoded!")
 
                 if index > self.support_spacing:
-                    support_base = dna_sequence[index - (self.support_spacing + 1)]
+                    support_code = codes[index - (self.support_spacing + 1)]
                 else:
-                    support_base = self.support_bases[index]
+                    support_code = base_index[self.support_bases[index]]
 
-                dna_sequence.append(self._binary_to_base(upper_bit, lower_bit, support_base))
+                codes.append(self._base_table[support_code][int(upper_bit)][int(lower_bit)])
 
-            return dna_sequence, None
+            return [index_base[code] for code in codes], None
 
         addition_length = abs(len(upper_list) - len(lower_list))
 
@@ -407,21 +1099,11 @@ class YYC:
                              used to identify one of the two bases by RULE 2, after RULE 1.
         :type: string
         """
-        current_options = []
-        for index in range(len(self.base_reference)):
-            if self.base_reference[index] == int(upper_bit):
-                current_options.append(index)
-
-        if self.current_code_matrix[base_index[support_base]][current_options[0]] == int(lower_bit):
-            one_base = index_base[current_options[0]]
-        else:
-            one_base = index_base[current_options[1]]
-
-        return one_base
+        return index_base[self._base_table[base_index[support_base]][int(upper_bit)][int(lower_bit)]]
 
     # ================================================= decode part ====================================================
 
-    def decode(self, dna_sequences, need_log=False):
+    def decode(self, dna_sequences, need_log=False, workers=1):
         """
         Decode DNA sequences to the data of binary file.
 
@@ -430,6 +1112,9 @@ class YYC:
 
         :param need_log: show the log.
         :type: bool
+
+        :param workers: the number of worker processes for decoding the DNA sequences in parallel.
+        :type: int
         """
 
         if not dna_sequences:
@@ -442,13 +1127,17 @@ class YYC:
             log.output(log.NORMAL, str(__name__), str(sys._getframe().f_code.co_name),
                        "Convert DNA sequences to binary matrix.")
 
-        matrix = self._convert_binaries(dna_sequences, need_log)
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                matrix = self._convert_binaries(dna_sequences, need_log, executor=executor, workers=workers)
+        else:
+            matrix = self._convert_binaries(dna_sequences, need_log)
 
         self.monitor.restore()
 
         return matrix, self.file_size
 
-    def _convert_binaries(self, dna_sequences, need_log):
+    def _convert_binaries(self, dna_sequences, need_log, block_size=65536, executor=None, workers=1):
         """
         Convert DNA sequences to binary matrix.
 
@@ -457,25 +1146,69 @@ class YYC:
 
         :param need_log: show the log.
         :type: bool
+
+        :param block_size: the number of DNA sequences converted together by the array operations.
+        :type: int
+
+        :param executor: the process pool which converts the shards of each block in parallel.
+        :type: concurrent.futures.ProcessPoolExecutor or None
+
+        :param workers: the number of worker processes in the process pool.
+        :type: int
         """
 
         matrix = []
 
-        last_valid_length = 0
-        for row in range(len(dna_sequences)):
+        for start_row in range(0, len(dna_sequences), block_size):
+            end_row = min(start_row + block_size, len(dna_sequences))
             if need_log:
-                self.monitor.output(row + 1, len(dna_sequences))
+                self.monitor.output(end_row, len(dna_sequences))
 
-            upper_row_datas, lower_row_datas = self._sequence_to_list(dna_sequences[row])
-            matrix.append(upper_row_datas)
+            block_sequences = [dna_sequences[row] if isinstance(dna_sequences[row], str)
+                               else "".join(dna_sequences[row]) for row in range(start_row, end_row)]
+            if executor is None:
+                upper_rows, lower_rows = self._sequences_to_lists(block_sequences)
+            else:
+                upper_rows, lower_rows = self._convert_in_parallel(block_sequences, executor, workers)
+            for upper_row_datas, lower_row_datas in zip(upper_rows, lower_rows):
+                matrix.append(upper_row_datas)
 
-            if upper_row_datas != lower_row_datas:
-                matrix.append(lower_row_datas)
+                if upper_row_datas != lower_row_datas:
+                    matrix.append(lower_row_datas)
 
         del dna_sequences
 
         return matrix
 
+    def _convert_in_parallel(self, dna_sequences, executor, workers):
+        """
+        Shard DNA sequences across the worker processes, and merge the binary strings back in order.
+
+        :param dna_sequences: the DNA sequences.
+        :type: list(string)
+
+        :param executor: the process pool.
+        :type: concurrent.futures.ProcessPoolExecutor
+
+        :param workers: the number of worker processes in the process pool.
+        :type: int
+
+        :return: upper binary strings and lower binary strings.
+        """
+        shard_size = math.ceil(len(dna_sequences) / workers)
+        shards = [dna_sequences[start: start + shard_size] for start in range(0, len(dna_sequences), shard_size)]
+        chunks = [(self._decode_rule(), "\n".join(shard).encode()) for shard in shards]
+
+        upper_rows, lower_rows = [], []
+        for shard, (upper_string, lower_string) in zip(shards, executor.map(_decode_bytes, chunks)):
+            position = 0
+            for dna_sequence in shard:
+                upper_rows.append(upper_string[position: position + len(dna_sequence)])
+                lower_rows.append(lower_string[position: position + len(dna_sequence)])
+                position += len(dna_sequence)
+
+        return upper_rows, lower_rows
+
     def _sequence_to_list(self, dna_sequence, first_idx_length=20, next_idx_length=14):
         """
         Convert one DNA sequence to two-line binary list.
@@ -491,34 +1224,31 @@ class YYC:
                                 the valid length.
         :type: int
         """
+        upper_rows, lower_rows = self._sequences_to_lists([dna_sequence], first_idx_length, next_idx_length)
 
-        upper_row_list = ''
-        lower_row_list = ''
-        col = 0
-        while col < len(dna_sequence):
+        return upper_rows[0], lower_rows[0]
 
-            col_num = int((col - first_idx_length) / next_idx_length)
-            if dna_sequence[col:col+4] == 'TTTT' \
-                    and (col - first_idx_length) % next_idx_length == 0 \
-                    and [dna_sequence[(first_idx_length + x * next_idx_length):
-                    (first_idx_length + x * next_idx_length) + 4] == 'TTTT' for x in range(col_num)] == [1]*col_num:
-                upper_row_list += 'xxxx'
-                lower_row_list += 'xxxx'
-                col += 4
+    def _sequences_to_lists(self, dna_sequences, first_idx_length=20, next_idx_length=14):
+        """
+        Convert DNA sequences to two-line binary strings by array operations.
 
-            else:
-                if col > self.support_spacing:
-                    upper_binary, lower_binary = self._base_to_binary(dna_sequence[col],
-                                                                      dna_sequence[col - (self.support_spacing + 1)])
-                    upper_row_list += str(upper_binary)
-                    lower_row_list += str(lower_binary)
-                else:
-                    upper_binary, lower_binary = self._base_to_binary(dna_sequence[col], self.support_bases[col])
-                    upper_row_list += str(upper_binary)
-                    lower_row_list += str(lower_binary)
-                col += 1
+        :param dna_sequences: the DNA sequences.
+        :type: list
+
+        :param first_idx_length: the length of the prime index.
+        :type: int
+
+        :param next_idx_length: the total length of the minor index.
+                                Note that the length of the minor index is the length of the marking plus
+                                the valid length.
+        :type: int
+
+        :return: upper binary strings and lower binary strings.
+        """
+        return _sequences_to_bits(self._decode_rule(), dna_sequences, first_idx_length, next_idx_length)
 
-        return upper_row_list, lower_row_list
+    def _decode_rule(self):
+        return self.base_reference, self.current_code_matrix, self.support_bases, self.support_spacing
 
     def _base_to_binary(self, current_base, support_base):
         """
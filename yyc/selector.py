@@ -0,0 +1,262 @@
+"""
+Name: Rule selector
+
+Function(s):
+Select the best rule of YYC for the requested file.
+The rules are scored by the DNA sequences encoded from a sample of the file segments, so the cost is independent
+of the file size.
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from yyc import scheme
+from yyc.utils import log, rule_set
+from yyc.utils.monitor import Monitor
+
+
+# noinspection PyProtectedMember
+def sample_segments(input_path, payload_length=120, sample_count=1024, index_length=20, seed=30):
+    """
+    Sample the binary segments of the file, each segment is connected with its index as index_operator.connect_all.
+
+    :param input_path: the path of the file.
+    :type: string
+
+    :param payload_length: the binary segment length used for DNA sequence generation.
+    :type: int
+
+    :param sample_count: the max number of sampled segments.
+    :type: int
+
+    :param index_length: the length of the index connected before each segment, 0 means no index.
+    :type: int
+
+    :param seed: the random seed of sampling.
+    :type: int
+
+    :return: the array of sampled binary segments, in the order of the file.
+    """
+    size = os.path.getsize(input_path)
+    if size == 0:
+        log.output(log.ERROR, str(__name__), str(sys._getframe().f_code.co_name),
+                   "The input file is empty!")
+
+    total_count = math.ceil(size * 8 / payload_length)
+    if total_count <= sample_count:
+        rows = list(range(total_count))
+    else:
+        rows = sorted(random.Random(seed).sample(range(total_count), sample_count))
+
+    segments = np.zeros((len(rows), index_length + payload_length), dtype=np.uint8)
+    with open(input_path, mode="rb") as file:
+        for position, row in enumerate(rows):
+            start_bit, stop_bit = row * payload_length, min((row + 1) * payload_length, size * 8)
+            file.seek(start_bit // 8)
+            bits = np.unpackbits(np.frombuffer(file.read(math.ceil(stop_bit / 8) - start_bit // 8), dtype=np.uint8))
+            bits = bits[start_bit % 8: start_bit % 8 + stop_bit - start_bit]
+            segments[position, index_length: index_length + len(bits)] = bits
+
+    if index_length > 0:
+        shifts = np.arange(index_length - 1, -1, -1)
+        segments[:, :index_length] = (np.array(rows, dtype=np.int64)[:, None] >> shifts) & 1
+
+    return segments
+
+
+# noinspection PyProtectedMember
+def score_rules(segments, rules=None, max_homopolymer=4, max_content=0.6, workers=1, chunk_size=256, need_log=False):
+    """
+    Score the rules of YYC by the DNA sequences encoded from the sampled segments.
+    The adjacent segments are paired, and the DNA sequences of a chunk of rules are encoded column by column,
+    the checks are the same as validity.batch_check.
+    The ranking only uses the sampled segments, no other statistics of the file are considered.
+
+    :param segments: the sampled binary segments from sample_segments.
+    :type: numpy.ndarray
+
+    :param rules: the rules of YYC from rule_set, None means all the available rules.
+    :type: list
+
+    :param max_homopolymer: maximum length of homopolymer.
+    :type: int
+
+    :param max_content: maximum content of C and G, which means GC content is in [1 - max_content, max_content].
+    :type: float
+
+    :param workers: the number of worker processes for scoring in parallel.
+    :type: int
+
+    :param chunk_size: the number of rules scored together by the array operations.
+    :type: int
+
+    :param need_log: show the log.
+    :type: bool
+
+    :return: the identity, valid ratio, mean GC deviation and mean max homopolymer of each rule, best first.
+    """
+    if rules is None:
+        rules = rule_set.get_yyc_rules()
+
+    if len(segments) < 2:
+        log.output(log.ERROR, str(__name__), str(sys._getframe().f_code.co_name),
+                   "At least two segments are required to score the rules!")
+
+    if need_log:
+        log.output(log.NORMAL, str(__name__), str(sys._getframe().f_code.co_name),
+                   "Score " + str(len(rules)) + " rules by " + str(len(segments) // 2) + " pairs of segments.")
+
+    pair_bits = segments[0: len(segments) // 2 * 2: 2] * 2 + segments[1: len(segments) // 2 * 2: 2]
+    chunks = [(_rule_tables(rules[start: start + chunk_size]),
+               [rule.identity for rule in rules[start: start + chunk_size]],
+               pair_bits, max_homopolymer, max_content)
+              for start in range(0, len(rules), chunk_size)]
+
+    scores, m = [], Monitor()
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for index, chunk_scores in enumerate(executor.map(_score_chunk, chunks)):
+                scores += chunk_scores
+                if need_log:
+                    m.output(index + 1, len(chunks))
+    else:
+        for index, chunk in enumerate(chunks):
+            scores += _score_chunk(chunk)
+            if need_log:
+                m.output(index + 1, len(chunks))
+
+    return sorted(scores, key=lambda score: (-score[1], score[2], score[3], score[0]))
+
+
+def select_rule(input_path, payload_length=120, sample_count=1024, max_homopolymer=4, max_content=0.6,
+                search_count=100, min_free_energy=None, workers=1, need_log=False):
+    """
+    Select the best rule of YYC for the file, and build the YYC with it.
+
+    :param input_path: the path of the file.
+    :type: string
+
+    :param payload_length: the binary segment length used for DNA sequence generation.
+    :type: int
+
+    :param sample_count: the max number of sampled segments.
+    :type: int
+
+    :param max_homopolymer: maximum length of homopolymer.
+    :type: int
+
+    :param max_content: maximum content of C and G, which means GC content is in [1 - max_content, max_content].
+    :type: float
+
+    :param search_count: the searching number of the YYC.
+    :type: int
+
+    :param min_free_energy: the free energy of DNA sequence is lower than required min free energy.
+    :type: float
+
+    :param workers: the number of worker processes for scoring in parallel.
+    :type: int
+
+    :param need_log: show the log.
+    :type: bool
+
+    :return: the YYC with the best rule.
+    """
+    segments = sample_segments(input_path, payload_length, sample_count)
+    scores = score_rules(segments, None, max_homopolymer, max_content, workers, need_log=need_log)
+    info = rule_set.get_yyc_rule_by_index(scores[0][0], need_log)
+
+    return scheme.YYC(base_reference=info["yang"], current_code_matrix=info["yin"], support_bases=info["v"],
+                      search_count=search_count, max_homopolymer=max_homopolymer, max_content=max_content,
+                      min_free_energy=min_free_energy)
+
+
+def _rule_tables(rules):
+    """
+    Build the transition tables of the rules.
+
+    :param rules: the rules of YYC from rule_set.
+    :type: list
+
+    :return: the array, [rule][support code * 4 + upper bit * 2 + lower bit] is the code of the current base,
+             and [rule][16] is the code of the support base.
+    """
+    tables = np.zeros((len(rules), 17), dtype=np.uint8)
+    for index, rule in enumerate(rules):
+        tables[index, :16] = rule.flat_table
+        tables[index, 16] = rule.b2i[rule.support_base]
+
+    return tables
+
+
+def _score_chunk(chunk):
+    """
+    The task of scoring a chunk of rules.
+
+    :param chunk: rule tables, rule identities, paired bits (upper bit * 2 + lower bit),
+                  maximum length of homopolymer and maximum content of C and G.
+    :type: tuple
+
+    :return: the identity, valid ratio, mean GC deviation and mean max homopolymer of each rule.
+    """
+    tables, identities, pair_bits, max_homopolymer, max_content = chunk
+    length = pair_bits.shape[1]
+    offsets = (np.arange(len(tables), dtype=np.uint16) * 17)[:, None]
+    flat_tables = tables.reshape(-1)
+    pair_bits = pair_bits.T.astype(np.uint16)
+
+    # The C and G count and the homopolymer run of each DNA sequence are tracked column by column.
+    support_codes = np.broadcast_to(tables[:, 16:17], (len(tables), pair_bits.shape[1])).astype(np.uint16)
+    cg_counts = np.zeros(support_codes.shape, dtype=np.uint16)
+    runs = np.ones(support_codes.shape, dtype=np.uint16)
+    max_runs = np.ones(support_codes.shape, dtype=np.uint16)
+    for col in range(length):
+        codes = flat_tables.take(offsets + (support_codes << 2) + pair_bits[col]).astype(np.uint16)
+        cg_counts += (codes == 1) | (codes == 2)
+        if col > 0:
+            same = codes == support_codes
+            runs += 1
+            runs *= same
+            runs += ~same
+            np.maximum(max_runs, runs, out=max_runs)
+        support_codes = codes
+
+    cg_contents = cg_counts / float(length)
+    valid_mask = (max_runs <= max_homopolymer) & ((1 - max_content) <= cg_contents) & (cg_contents <= max_content)
+
+    return [(identity, float(valid_ratio), float(deviation), float(mean_run))
+            for identity, valid_ratio, deviation, mean_run
+            in zip(identities, valid_mask.mean(axis=1), np.abs(cg_contents - 0.5).mean(axis=1), max_runs.mean(axis=1))]
+
+
+def main(arguments=None):
+    """
+    The command line of rule selection.
+
+    :param arguments: the command line arguments, None means sys.argv.
+    :type: list
+    """
+    parser = argparse.ArgumentParser(description="Select the best rule of YYC for the file.")
+    parser.add_argument("input_path", help="the path of the file.")
+    parser.add_argument("--payload-length", type=int, default=120, help="the binary segment length.")
+    parser.add_argument("--sample-count", type=int, default=1024, help="the max number of sampled segments.")
+    parser.add_argument("--max-homopolymer", type=int, default=4, help="maximum length of homopolymer.")
+    parser.add_argument("--max-content", type=float, default=0.6, help="maximum content of C and G.")
+    parser.add_argument("--workers", type=int, default=1, help="the number of worker processes.")
+    parser.add_argument("--top", type=int, default=5, help="the number of best rules to show.")
+    arguments = parser.parse_args(arguments)
+
+    segments = sample_segments(arguments.input_path, arguments.payload_length, arguments.sample_count)
+    scores = score_rules(segments, None, arguments.max_homopolymer, arguments.max_content, arguments.workers)
+    for identity, valid_ratio, deviation, mean_run in scores[: arguments.top]:
+        print("rule " + str(identity) + ": valid ratio %.4f, GC deviation %.4f, mean max homopolymer %.2f, "
+              % (valid_ratio, deviation, mean_run) + str(rule_set.get_yyc_rule_by_index(identity)))
+
+
+if __name__ == "__main__":
+    main()
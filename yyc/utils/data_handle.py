@@ -1,11 +1,25 @@
-import struct
 import math
 import sys
 import os
+import mmap
+import numpy as np
 
 import yyc.utils.log as log
 from yyc.utils.monitor import Monitor
 
+# The packed DNA file stores 4 bases in one byte (A = 00, C = 01, G = 10, T = 11, the first base in the high bits).
+# Layout: header | packed bases of all the rows | row table.
+#         header: magic (4 bytes) + version (1 byte) + reserved (3 bytes)
+#                 + sequence count (uint64) + position of the row table (uint64), in little endian.
+#         row table: row lengths (uint32 * count) + row offsets in bases (uint64 * (count + 1)).
+PACKED_DNA_MAGIC = b"YYCP"
+PACKED_DNA_VERSION = 1
+PACKED_DNA_SUFFIX = ".pdna"
+_PACKED_HEADER_LENGTH = 24
+_BASE_CODES = np.full(256, 255, dtype=np.uint8)
+_BASE_CODES[np.frombuffer(b"ACGT", dtype=np.uint8)] = np.arange(4, dtype=np.uint8)
+_CODE_BASES = np.frombuffer(b"ACGT", dtype=np.uint8)
+
 
 # noinspection PyProtectedMember
 def read_binary_from_all(path, payload_length, need_log=False):
@@ -23,6 +37,32 @@ def read_binary_from_all(path, payload_length, need_log=False):
     :param need_log: show the log.
     :type: bool
     """
+    matrix, size = read_binary_array_from_all(path, payload_length, need_log)
+
+    return matrix.tolist(), size
+
+
+# noinspection PyProtectedMember
+def read_binary_array_from_all(path, payload_length, need_log=False, chunk_size=1048576):
+    """
+    Reading binary matrix from document as a two-dimensional numpy array.
+    The file is read in large chunks and expanded with numpy.unpackbits,
+    the bits in the last row that exceed the file are filled with 0.
+
+    :param path: file path.
+    :type: string
+
+    :param payload_length: the binary segment length used for DNA sequence generation.
+                           Considering current DNA synthesis technique limitation,
+                           we usually set 120 as default segment length.
+    :type: int
+
+    :param need_log: show the log.
+    :type: bool
+
+    :param chunk_size: the number of bytes read from the file at one time.
+    :type: int
+    """
 
     m = Monitor()
     try:
@@ -36,23 +76,20 @@ def read_binary_from_all(path, payload_length, need_log=False):
 
             size = os.path.getsize(path)
 
-            # Set init storage matrix
-            matrix = [[0 for _ in range(payload_length)] for _ in range(math.ceil(size * 8 / payload_length))]
-
-            row = 0
-            col = 0
-            for byte_index in range(size):
+            # Set init storage matrix, the flat view shares memory with the matrix
+            matrix = np.zeros((math.ceil(size * 8 / payload_length), payload_length), dtype=np.uint8)
+            bits = matrix.reshape(-1)
+
+            position = 0
+            while position < size:
+                # Read a file as a chunk of bytes
+                chunk = np.frombuffer(file.read(min(chunk_size, size - position)), dtype=np.uint8)
+                if len(chunk) == 0:
+                    break
+                bits[position * 8: (position + len(chunk)) * 8] = np.unpackbits(chunk)
+                position += len(chunk)
                 if need_log:
-                    m.output(byte_index + 1, size)
-                # Read a file as bytes
-                one_byte = file.read(1)
-                element = list(map(int, list(str(bin(struct.unpack("B", one_byte)[0]))[2:].zfill(8))))
-                for bit_index in range(8):
-                    matrix[row][col] = element[bit_index]
-                    col += 1
-                    if col == payload_length:
-                        col = 0
-                        row += 1
+                    m.output(position, size)
 
         if int(len(str(bin(len(matrix)))) - 2) * 7 > payload_length:
             if need_log:
@@ -67,6 +104,53 @@ def read_binary_from_all(path, payload_length, need_log=False):
                    "The file selection operation was not performed correctly. Please execute the operation again!")
 
 
+# noinspection PyProtectedMember
+def read_binary_batches(path, payload_length, batch_size, need_log=False):
+    """
+    Reading binary matrix from document batch by batch.
+    Each batch is a list of batch_size binary segments (the last batch may be shorter),
+    the bits in the last segment that exceed the file are filled with 0.
+
+    :param path: file path.
+    :type: string
+
+    :param payload_length: the binary segment length used for DNA sequence generation.
+    :type: int
+
+    :param batch_size: the number of binary segments in one batch.
+    :type: int
+
+    :param need_log: show the log.
+    :type: bool
+    """
+    try:
+        with open(path, mode="rb") as file:
+            if need_log:
+                log.output(log.NORMAL, str(__name__), str(sys._getframe().f_code.co_name),
+                           "Read binary matrix from file by batch: " + path)
+
+            chunk_size = math.ceil(batch_size * payload_length / 8)
+            remain_bits = np.zeros(0, dtype=np.uint8)
+            while True:
+                chunk = np.frombuffer(file.read(chunk_size), dtype=np.uint8)
+                if len(chunk) == 0:
+                    break
+                bits = np.concatenate((remain_bits, np.unpackbits(chunk)))
+                count = len(bits) // payload_length
+                remain_bits = bits[count * payload_length:]
+                if count > 0:
+                    yield bits[:count * payload_length].reshape(count, payload_length).tolist()
+
+            if len(remain_bits) > 0:
+                last_row = np.zeros(payload_length, dtype=np.uint8)
+                last_row[:len(remain_bits)] = remain_bits
+                yield [last_row.tolist()]
+
+    except IOError:
+        log.output(log.ERROR, str(__name__), str(sys._getframe().f_code.co_name),
+                   "The file selection operation was not performed correctly. Please execute the operation again!")
+
+
 def read_binary_string_from_all(path, need_log=False):
 
     m = Monitor()
@@ -80,15 +164,12 @@ def read_binary_string_from_all(path, need_log=False):
                            "Read binary matrix from file: " + path)
 
             size = os.path.getsize(path)
-            binary_string = ""
 
-            for byte_index in range(size):
-                if need_log:
-                    m.output(byte_index + 1, size)
-                # Read a file as bytes
-                one_byte = file.read(1)
-                element = str(bin(struct.unpack("B", one_byte)[0]))[2:].zfill(8)
-                binary_string += element
+            # Expand the bytes to the characters '0' and '1' at once
+            bits = np.unpackbits(np.frombuffer(file.read(), dtype=np.uint8))
+            binary_string = (bits + ord("0")).tobytes().decode()
+            if need_log:
+                m.output(size, size)
 
         return binary_string, size
 
@@ -98,9 +179,11 @@ def read_binary_string_from_all(path, need_log=False):
 
 
 # noinspection PyBroadException,PyProtectedMember
-def write_all_from_binary(path, matrix, size, need_log=False):
+def write_all_from_binary(path, matrix, size, need_log=False, chunk_size=1048576):
     """
     Writing binary matrix to document.
+    The rows beginning with 15 zeros are the tail rows, in which the next 7 bits record the count of valid bits
+    at the end of the row. The valid bits are concatenated and written with numpy.packbits in large chunks.
 
     :param path: file path.
     :type: string
@@ -113,6 +196,9 @@ def write_all_from_binary(path, matrix, size, need_log=False):
 
     :param need_log: show the log.
     :type: bool
+
+    :param chunk_size: the number of bytes written to the file at one time.
+    :type: int
     """
     m = Monitor()
 
@@ -122,43 +208,56 @@ def write_all_from_binary(path, matrix, size, need_log=False):
                 log.output(log.NORMAL, str(__name__), str(sys._getframe().f_code.co_name),
                            "Write file from binary matrix: " + path)
 
-            bit_index = 0
-            temp_byte = 0
-            count = 0
+            chunk_bits = chunk_size * 8
+            buffer = []
+            buffer_length = 0
             for row in range(len(matrix)):
-                print(matrix[row])
                 if need_log:
                     m.output(row + 1, len(matrix))
 
-                col = 0
-                while col < len(matrix[row]):
-                    if col == 0 and matrix[row][:15] == '0'*15:
-                        count += 1
-                        need_extract = int('0b'+matrix[row][15:22], 2)
-                        for c in range(len(matrix[row])-need_extract, len(matrix[row])):
-                            bit_index += 1
-                            temp_byte *= 2
-                            temp_byte += int(matrix[row][c])
-                            if bit_index == 8:
-                                file.write(struct.pack("B", int(temp_byte)))
-                                bit_index = 0
-                                temp_byte = 0
-                        col = len(matrix[row])
+                if isinstance(matrix[row], str):
+                    if matrix[row][:15] == "0" * 15:
+                        need_extract = int("0b" + matrix[row][15:22], 2)
+                        valid_bits = matrix[row][len(matrix[row]) - need_extract:]
                     else:
-                        bit_index += 1
-                        temp_byte *= 2
-                        temp_byte += int(matrix[row][col])
-                        if bit_index == 8:
-                            file.write(struct.pack("B", int(temp_byte)))
-                            bit_index = 0
-                            temp_byte = 0
-                        col += 1
+                        valid_bits = matrix[row]
+                else:
+                    valid_bits = "".join(map(str, matrix[row]))
+
+                buffer.append(valid_bits)
+                buffer_length += len(valid_bits)
+
+                if buffer_length >= chunk_bits:
+                    buffer = [_write_packed_bits(file, "".join(buffer))]
+                    buffer_length = len(buffer[0])
+
+            # The remaining bits which cannot make up one byte are discarded.
+            _write_packed_bits(file, "".join(buffer))
 
     except IOError:
         log.output(log.ERROR, str(__name__), str(sys._getframe().f_code.co_name),
                    "The file selection operation was not performed correctly. Please execute the operation again!")
 
 
+def _write_packed_bits(file, bit_string):
+    """
+    Write the complete bytes of a '0'/'1' string to the file.
+
+    :param file: opened binary file.
+    :type: file object
+
+    :param bit_string: string of '0' and '1'.
+    :type: string
+
+    :return: the remaining bits which cannot make up one byte.
+    """
+    byte_length = len(bit_string) // 8
+    bits = np.frombuffer(bit_string[:byte_length * 8].encode(), dtype=np.uint8) - ord("0")
+    file.write(np.packbits(bits).tobytes())
+
+    return bit_string[byte_length * 8:]
+
+
 # noinspection PyBroadException,PyProtectedMember
 def read_dna_file(path, need_log=False):
     """
@@ -197,6 +296,156 @@ def read_dna_file(path, need_log=False):
                    "The file selection operation was not performed correctly. Please execute the operation again!")
 
 
+# noinspection PyProtectedMember
+class IndexedDNAFile:
+
+    def __init__(self, path, need_log=False, use_sidecar=False, chunk_size=16777216):
+        """
+        introduction: Memory-mapped DNA sequence file with a line-offset index.
+                      Any row can be fetched without reading the whole file, and the rows are iterated lazily.
+                      If use_sidecar, the line-offset index is saved to (and loaded from) the sidecar file "path.idx",
+                      it is rebuilt when the sidecar does not match the size or the modified time of the DNA file.
+
+        :param path: file path.
+        :type: string
+
+        :param need_log: show the log.
+        :type: bool
+
+        :param use_sidecar: whether load and save the line-offset index from the sidecar file.
+        :type: bool
+
+        :param chunk_size: the number of bytes scanned at one time when building the line-offset index.
+        :type: int
+        """
+        self.path = path
+        self.index_path = path + ".idx"
+
+        try:
+            self.file = open(path, "rb")
+        except IOError:
+            log.output(log.ERROR, str(__name__), str(sys._getframe().f_code.co_name),
+                       "The file selection operation was not performed correctly. Please execute the operation again!")
+
+        if need_log:
+            log.output(log.NORMAL, str(__name__), str(sys._getframe().f_code.co_name),
+                       "Map DNA sequences from file: " + path)
+
+        status = os.fstat(self.file.fileno())
+        self.size = status.st_size
+        self.mtime = status.st_mtime_ns
+
+        if self.size > 0:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self.data = b""
+
+        self.offsets = None
+        if use_sidecar:
+            self.offsets = self._load_index()
+        if self.offsets is None:
+            self.offsets = self._build_index(chunk_size, need_log)
+            if use_sidecar:
+                self._save_index()
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row):
+        """
+        introduction: Get the DNA sequence of the row.
+
+        :param row: row of DNA sequence, negative row counts from the end, or a slice of rows.
+        :type: int or slice
+
+        :return: DNA sequence, or the list of DNA sequences for a slice.
+        """
+        if isinstance(row, slice):
+            return [self[index] for index in range(*row.indices(len(self)))]
+
+        return str(self.get_bytes(row), "ascii")
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self[row]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def get_bytes(self, row):
+        """
+        introduction: Get the DNA sequence of the row as a zero-copy view of the mapped file.
+                      Note that the views need to be released before closing the file.
+
+        :param row: row of DNA sequence, negative row counts from the end.
+        :type: int
+
+        :return: DNA sequence in the memoryview of ASCII bytes.
+        """
+        if row < 0:
+            row += len(self)
+        if row < 0 or row >= len(self):
+            raise IndexError("Row " + str(row) + " is out of range (" + str(len(self)) + " rows)!")
+
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1]) - 1
+        if end > start and self.data[end - 1] == ord("\r"):
+            end -= 1
+
+        return memoryview(self.data)[start: end]
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.file.close()
+
+    def _build_index(self, chunk_size, need_log):
+        """
+        introduction: Find the start offset of each row, the last offset is the end of file plus one newline.
+
+        :return: start offsets of the rows.
+        """
+        m = Monitor()
+
+        offsets = [np.zeros(1, dtype=np.int64)]
+        for position in range(0, self.size, chunk_size):
+            chunk = np.frombuffer(self.data, dtype=np.uint8,
+                                  count=min(chunk_size, self.size - position), offset=position)
+            offsets.append(np.flatnonzero(chunk == ord("\n")).astype(np.int64) + (position + 1))
+            if need_log:
+                m.output(min(position + chunk_size, self.size), self.size)
+        offsets = np.concatenate(offsets)
+
+        # The last row does not end with a newline.
+        if offsets[-1] < self.size:
+            offsets = np.append(offsets, self.size + 1)
+
+        return offsets
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, "rb") as file:
+                information = np.fromfile(file, dtype=np.int64)
+        except IOError:
+            return None
+
+        if len(information) < 3 or information[0] != self.size or information[1] != self.mtime:
+            return None
+
+        return information[2:]
+
+    def _save_index(self):
+        try:
+            with open(self.index_path, "wb") as file:
+                np.array([self.size, self.mtime], dtype=np.int64).tofile(file)
+                self.offsets.tofile(file)
+        except IOError:
+            log.output(log.WARN, str(__name__), str(sys._getframe().f_code.co_name),
+                       "The line-offset index cannot be saved to " + self.index_path + ".")
+
+
 # noinspection PyProtectedMember,PyBroadException
 def write_dna_file(path, dna_sequences, need_log=False):
     """
@@ -206,12 +455,17 @@ def write_dna_file(path, dna_sequences, need_log=False):
     :type: string
 
     :param dna_sequences: generated DNA sequences.
+                          If the path ends with ".pdna", they are written as the packed DNA file.
     :type: one-dimensional list(string)
 
     :param need_log: show the log.
     :type: bool
     """
 
+    if path.endswith(PACKED_DNA_SUFFIX):
+        write_packed_dna_batches(path, [dna_sequences], need_log)
+        return dna_sequences
+
     m = Monitor()
 
     try:
@@ -227,3 +481,293 @@ def write_dna_file(path, dna_sequences, need_log=False):
     except IOError:
         log.output(log.ERROR, str(__name__), str(sys._getframe().f_code.co_name),
                    "The file selection operation was not performed correctly. Please execute the operation again!")
+
+
+# noinspection PyProtectedMember,PyBroadException
+def write_dna_batches(path, dna_batches, need_log=False):
+    """
+    Writing DNA sequence set to documents batch by batch.
+
+    :param path: file path.
+    :type: string
+
+    :param dna_batches: iterable of generated DNA sequence batches.
+                        If the path ends with ".pdna", they are written as the packed DNA file.
+    :type: iterable(one-dimensional list(string))
+
+    :param need_log: show the log.
+    :type: bool
+
+    :return: the number of written DNA sequences.
+    """
+    if path.endswith(PACKED_DNA_SUFFIX):
+        return write_packed_dna_batches(path, dna_batches, need_log)
+
+    try:
+        with open(path, "w") as file:
+            if need_log:
+                log.output(log.NORMAL, str(__name__), str(sys._getframe().f_code.co_name),
+                           "Write DNA sequences to file by batch: " + path)
+            count = 0
+            for dna_sequences in dna_batches:
+                file.write("".join(["".join(dna_sequence) + "\n" for dna_sequence in dna_sequences]))
+                count += len(dna_sequences)
+        return count
+    except IOError:
+        log.output(log.ERROR, str(__name__), str(sys._getframe().f_code.co_name),
+                   "The file selection operation was not performed correctly. Please execute the operation again!")
+
+
+# noinspection PyProtectedMember
+def open_dna_file(path, need_log=False, use_sidecar=False):
+    """
+    Open DNA sequence set from documents with random access, the packed DNA file is detected by its magic.
+
+    :param path: file path.
+    :type: string
+
+    :param need_log: show the log.
+    :type: bool
+
+    :param use_sidecar: whether load and save the line-offset index of the DNA file from the sidecar file "path.idx".
+    :type: bool
+
+    :return: PackedDNAFile or IndexedDNAFile.
+    """
+    try:
+        with open(path, "rb") as file:
+            magic = file.read(len(PACKED_DNA_MAGIC))
+    except IOError:
+        log.output(log.ERROR, str(__name__), str(sys._getframe().f_code.co_name),
+                   "The file selection operation was not performed correctly. Please execute the operation again!")
+
+    if magic == PACKED_DNA_MAGIC:
+        return PackedDNAFile(path, need_log)
+
+    return IndexedDNAFile(path, need_log, use_sidecar)
+
+
+# noinspection PyProtectedMember,PyBroadException
+def write_packed_dna_batches(path, dna_batches, need_log=False):
+    """
+    Writing DNA sequence set to the packed DNA file batch by batch.
+
+    :param path: file path.
+    :type: string
+
+    :param dna_batches: iterable of generated DNA sequence batches.
+    :type: iterable(one-dimensional list(string))
+
+    :param need_log: show the log.
+    :type: bool
+
+    :return: the number of written DNA sequences.
+    """
+    try:
+        with open(path, "wb") as file:
+            if need_log:
+                log.output(log.NORMAL, str(__name__), str(sys._getframe().f_code.co_name),
+                           "Write DNA sequences to packed file: " + path)
+
+            file.write(bytes(_PACKED_HEADER_LENGTH))
+
+            lengths = []
+            remain_codes = np.zeros(0, dtype=np.uint8)
+            for dna_sequences in dna_batches:
+                dna_sequences = ["".join(dna_sequence) for dna_sequence in dna_sequences]
+                lengths.append(np.array([len(dna_sequence) for dna_sequence in dna_sequences], dtype="<u4"))
+
+                codes = _BASE_CODES[np.frombuffer("".join(dna_sequences).encode(), dtype=np.uint8)]
+                if np.any(codes == 255):
+                    log.output(log.ERROR, str(__name__), str(sys._getframe().f_code.co_name),
+                               "Only A, C, G and T can be included in the packed DNA file!")
+
+                codes = np.concatenate((remain_codes, codes))
+                packed_length = len(codes) // 4 * 4
+                file.write(_pack_codes(codes[:packed_length]))
+                remain_codes = codes[packed_length:]
+
+            if len(remain_codes) > 0:
+                file.write(_pack_codes(np.concatenate((remain_codes, np.zeros(4 - len(remain_codes), np.uint8)))))
+
+            lengths = np.concatenate(lengths) if len(lengths) > 0 else np.zeros(0, dtype="<u4")
+            offsets = np.zeros(len(lengths) + 1, dtype="<u8")
+            np.cumsum(lengths, out=offsets[1:])
+
+            table_position = file.tell()
+            file.write(lengths.tobytes())
+            file.write(offsets.tobytes())
+
+            file.seek(0)
+            file.write(PACKED_DNA_MAGIC + bytes([PACKED_DNA_VERSION, 0, 0, 0])
+                       + np.array([len(lengths), table_position], dtype="<u8").tobytes())
+
+        return len(lengths)
+    except IOError:
+        log.output(log.ERROR, str(__name__), str(sys._getframe().f_code.co_name),
+                   "The file selection operation was not performed correctly. Please execute the operation again!")
+
+
+def _pack_codes(codes):
+    """
+    Pack base codes into bytes, 4 bases per byte.
+
+    :param codes: base codes, the length is multiple of 4.
+    :type: numpy.ndarray
+
+    :return: packed bytes.
+    """
+    codes = codes.reshape(-1, 4)
+    return ((codes[:, 0] << 6) | (codes[:, 1] << 4) | (codes[:, 2] << 2) | codes[:, 3]).astype(np.uint8).tobytes()
+
+
+# noinspection PyProtectedMember
+class PackedDNAFile:
+
+    def __init__(self, path, need_log=False):
+        """
+        introduction: Memory-mapped packed DNA file, with the same access as IndexedDNAFile.
+
+        :param path: file path.
+        :type: string
+
+        :param need_log: show the log.
+        :type: bool
+        """
+        self.path = path
+
+        try:
+            self.file = open(path, "rb")
+        except IOError:
+            log.output(log.ERROR, str(__name__), str(sys._getframe().f_code.co_name),
+                       "The file selection operation was not performed correctly. Please execute the operation again!")
+
+        if need_log:
+            log.output(log.NORMAL, str(__name__), str(sys._getframe().f_code.co_name),
+                       "Map DNA sequences from packed file: " + path)
+
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self.data[:len(PACKED_DNA_MAGIC)] != PACKED_DNA_MAGIC or self.data[4] != PACKED_DNA_VERSION:
+            log.output(log.ERROR, str(__name__), str(sys._getframe().f_code.co_name),
+                       "The file " + path + " is not a packed DNA file of version " + str(PACKED_DNA_VERSION) + "!")
+
+        count, table_position = np.frombuffer(self.data, dtype="<u8", count=2, offset=8).tolist()
+        self.lengths = np.frombuffer(self.data, dtype="<u4", count=count, offset=table_position).copy()
+        self.offsets = np.frombuffer(self.data, dtype="<u8", count=count + 1,
+                                     offset=table_position + count * 4).astype(np.int64)
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def __getitem__(self, row):
+        """
+        introduction: Get the DNA sequence of the row.
+
+        :param row: row of DNA sequence, negative row counts from the end, or a slice of rows.
+        :type: int or slice
+
+        :return: DNA sequence, or the list of DNA sequences for a slice.
+        """
+        if isinstance(row, slice):
+            return [self[index] for index in range(*row.indices(len(self)))]
+
+        if row < 0:
+            row += len(self)
+        if row < 0 or row >= len(self):
+            raise IndexError("Row " + str(row) + " is out of range (" + str(len(self)) + " rows)!")
+
+        return self._unpack_bases(int(self.offsets[row]), int(self.offsets[row + 1]))
+
+    def __iter__(self, block_size=65536):
+        # Unpack a block of rows at one time.
+        for start_row in range(0, len(self), block_size):
+            end_row = min(start_row + block_size, len(self))
+            start = int(self.offsets[start_row])
+            bases = self._unpack_bases(start, int(self.offsets[end_row]))
+            for row in range(start_row, end_row):
+                yield bases[int(self.offsets[row]) - start: int(self.offsets[row + 1]) - start]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+    def _unpack_bases(self, start, end):
+        """
+        introduction: Unpack the bases in [start, end) of the packed data.
+
+        :param start: start position of bases.
+        :type: int
+
+        :param end: end position of bases.
+        :type: int
+
+        :return: DNA string.
+        """
+        if end <= start:
+            return ""
+
+        start_byte, end_byte = start // 4, (end + 3) // 4
+        packed = np.frombuffer(self.data, dtype=np.uint8, count=end_byte - start_byte,
+                               offset=_PACKED_HEADER_LENGTH + start_byte)
+        codes = np.stack(((packed >> 6) & 3, (packed >> 4) & 3, (packed >> 2) & 3, packed & 3), axis=1).reshape(-1)
+
+        return _CODE_BASES[codes[start - start_byte * 4: end - start_byte * 4]].tobytes().decode()
+
+
+# noinspection PyProtectedMember
+def convert_dna_file_to_packed(dna_path, packed_path, batch_size=65536, need_log=False):
+    """
+    Convert the DNA file in text format to the packed DNA file.
+
+    :param dna_path: path of DNA file in text format.
+    :type: string
+
+    :param packed_path: path of packed DNA file.
+    :type: string
+
+    :param batch_size: the number of DNA sequences converted at one time.
+    :type: int
+
+    :param need_log: show the log.
+    :type: bool
+
+    :return: the number of converted DNA sequences.
+    """
+    with IndexedDNAFile(dna_path, need_log) as dna_sequences:
+        batches = (dna_sequences[row: row + batch_size] for row in range(0, len(dna_sequences), batch_size))
+        return write_packed_dna_batches(packed_path, batches, need_log)
+
+
+# noinspection PyProtectedMember
+def convert_packed_to_dna_file(packed_path, dna_path, need_log=False):
+    """
+    Convert the packed DNA file to the DNA file in text format.
+
+    :param packed_path: path of packed DNA file.
+    :type: string
+
+    :param dna_path: path of DNA file in text format.
+    :type: string
+
+    :param need_log: show the log.
+    :type: bool
+
+    :return: the number of converted DNA sequences.
+    """
+    with PackedDNAFile(packed_path, need_log) as dna_sequences:
+        try:
+            with open(dna_path, "w") as file:
+                for dna_sequence in dna_sequences:
+                    file.write(dna_sequence + "\n")
+        except IOError:
+            log.output(log.ERROR, str(__name__), str(sys._getframe().f_code.co_name),
+                       "The file selection operation was not performed correctly. Please execute the operation again!")
+
+        return len(dna_sequences)
@@ -1,5 +1,9 @@
+import bisect
 import copy
 import copyreg
+import itertools
+import os
+import pickle
 import sys
 import numpy as np
 
@@ -12,13 +16,13 @@ def connect_all(matrix, need_log=False):
     """
     Integrate index and data from the two-dimensional matrix.
 
-    :param matrix: data from input.
-    :type: list
+    :param matrix: data from input, the list of binary lists or the array from data_handle.read_binary_array_from_all.
+                   The type of the returned matrix is the same as it.
+    :type: list or numpy.ndarray
 
     :param need_log: show the log.
     :type: bool
     """
-    m = Monitor()
     # index_binary_length = int(len(str(bin(len(matrix)))) - 2)
     index_binary_length = 20
 
@@ -26,17 +30,72 @@ def connect_all(matrix, need_log=False):
         log.output(log.NORMAL, str(__name__), str(sys._getframe().f_code.co_name),
                    "Add index in the binary matrix.")
 
-    new_matrix = []
-    for row in range(len(matrix)):
-        if need_log:
-            m.output(row + 1, len(matrix))
-        new_matrix.append(connect(row, matrix[row], index_binary_length))
+    if isinstance(matrix, np.ndarray):
+        return connect_array(matrix, 0, index_binary_length)
 
-    m.restore()
+    return _connect_lists(matrix, 0, index_binary_length)
+
+
+def connect_batches(batches, need_log=False):
+    """
+    Integrate index and data batch by batch, the index continues across the batches.
+
+    :param batches: iterable of binary matrix batches.
+    :type: iterable(list)
+
+    :param need_log: show the log.
+    :type: bool
+    """
+    index_binary_length = 20
+
+    if need_log:
+        log.output(log.NORMAL, str(__name__), str(sys._getframe().f_code.co_name),
+                   "Add index in the binary matrix by batch.")
+
+    start = 0
+    for matrix in batches:
+        yield _connect_lists(matrix, start, index_binary_length)
+        start += len(matrix)
+
+
+# noinspection PyProtectedMember
+def connect_array(matrix, start, index_binary_length):
+    """
+    Integrate index and data for all the rows of the array at once.
+    The index block is built by shifting the row indexes, and stacked before the data.
+
+    :param matrix: data from input.
+    :type: numpy.ndarray
+
+    :param start: the index of the first row.
+    :type: int
+
+    :param index_binary_length: length of binary index.
+    :type: int
+    """
+    if start + len(matrix) - 1 >= 2 ** index_binary_length:
+        log.output(log.ERROR, str(__name__), str(sys._getframe().f_code.co_name),
+                   "The number of rows exceeds the range of " + str(index_binary_length) + "-bit index!")
+
+    shifts = np.arange(index_binary_length - 1, -1, -1, dtype=np.int64)
+    indexes = np.arange(start, start + len(matrix), dtype=np.int64)[:, None]
+    index_block = ((indexes >> shifts) & 1).astype(matrix.dtype)
 
-    del matrix, m
+    return np.hstack((index_block, matrix.reshape(len(matrix), -1)))
 
-    return new_matrix
+
+def _connect_lists(matrix, start, index_binary_length):
+    """
+    Integrate index and data for the list of binary lists.
+    The rows with the same length are connected by array, or each row is connected by the connect method.
+    """
+    if len(matrix) == 0:
+        return []
+
+    if start + len(matrix) - 1 < 2 ** index_binary_length and len(set(map(len, matrix))) == 1:
+        return connect_array(np.array(matrix, dtype=np.uint8), start, index_binary_length).tolist()
+
+    return [connect(start + row, matrix[row], index_binary_length) for row in range(len(matrix))]
 
 
 def connect(index, data, index_binary_length):
@@ -58,6 +117,27 @@ def connect(index, data, index_binary_length):
     return one_list
 
 
+def connect_version(index, data, first_idx_length=20, next_idx_length=14):
+    """
+    Integrate the index levels and data, the minor indexes are marked by 'xxxx'. For example, 20-1 and "0101" to
+    "00000000000000010100" + "xxxx0000000001" + "0101".
+
+    :param index: the index levels of data. For example, [20, 1].
+    :type: list
+
+    :param data: the binary string of data.
+    :type: string
+
+    :param first_idx_length: the length of the prime index.
+    :type: int
+
+    :param next_idx_length: the total length of the minor index.
+    :type: int
+    """
+    return bin(index[0])[2:].zfill(first_idx_length) \
+        + "".join(["xxxx" + bin(value)[2:].zfill(next_idx_length - 4) for value in index[1:]]) + data
+
+
 def divide(one_list, index_binary_length):
     """
     Separate data from the index in a binary sequence.
@@ -92,45 +172,208 @@ def divide_all_version(binary_lst, need_log=False, first_idx_length=20, next_idx
                             Note that the length of the minor index is the length of the marking plus the valid length.
     :type: int
     """
-    m = Monitor()
-    # index_binary_length = int(len(str(bin(len(matrix)))) - 2)
-    # index_binary_length = 20
+    version_indexes = parse_all_version(binary_lst, need_log, first_idx_length, next_idx_length)
+
+    indexs = [version_indexes.index_binary(row) for row in range(len(version_indexes))]
+    datas = [version_indexes.data(row) for row in range(len(version_indexes))]
+    indexs_int = [version_indexes.index(row) for row in range(len(version_indexes))]
+
+    return indexs, datas, indexs_int
+
+
+# noinspection PyProtectedMember
+def parse_all_version(binary_lst, need_log=False, first_idx_length=20, next_idx_length=14):
+    """
+    Parse the indexes of binary sequences in one pass over the joined binary sequences.
+
+    :param binary_lst: the binary sequences, the element is string of '0', '1' and 'x'.
+    :type: list(string)
+
+    :param need_log: show the log.
+    :type: bool
+
+    :param first_idx_length: the length of the prime index.
+    :type: int
+
+    :param next_idx_length: the total length of the minor index.
+                            Note that the length of the minor index is the length of the marking plus the valid length.
+    :type: int
 
+    :return: the parsed indexes.
+    :rtype: VersionIndexes
+    """
     if need_log:
         log.output(log.NORMAL, str(__name__), str(sys._getframe().f_code.co_name),
                    "Divide index and data from binary matrix.")
 
-    indexs = []
-    datas = []
-    indexs_int = []
-    datas_int = []
-    have_next_index_count = 0
-    for idx, binary_string in enumerate(binary_lst):
-        if need_log:
-            m.output(idx + 1, len(binary_lst))
-        if 'xxxx' not in binary_string:
-            index = binary_string[:first_idx_length]
-            data = binary_string[first_idx_length:]
-        else:
-            next_idx_num = binary_string.count('xxxx')
-            index = binary_string[:first_idx_length+next_idx_num*next_idx_length]
-            data = binary_string[first_idx_length+next_idx_num*next_idx_length:]
-            have_next_index_count += 1
-
-        indexs.append(index)
-        datas.append(data)
-        indexs_int.append([int(x, 2) for x in index.split('xxxx')])
-
-    return indexs, datas, indexs_int
+    return VersionIndexes(binary_lst, first_idx_length, next_idx_length)
+
+
+class VersionIndexes:
+
+    def __init__(self, binary_lst, first_idx_length=20, next_idx_length=14):
+        """
+        The indexes of binary sequences, parsed from the joined binary sequences.
+        The minor index marks 'xxxx' are at first_idx_length + k * next_idx_length (k = 0, 1, ...).
+
+        bits: the joined binary sequences packed 8 bits per byte, in which the marks are packed as 0.
+        starts, data_starts and ends: the bit offsets of each binary sequence, its data and its end in the bits.
+        depths: the number of index levels of each binary sequence, 1 means only the prime index.
+        keys: the index levels of each binary sequence, the missing levels are filled with 0.
+
+        :param binary_lst: the binary sequences, the element is string of '0', '1' and 'x'.
+        :type: list(string)
+
+        :param first_idx_length: the length of the prime index.
+        :type: int
+
+        :param next_idx_length: the total length of the minor index.
+        :type: int
+        """
+        lengths = np.fromiter(map(len, binary_lst), dtype=np.int64, count=len(binary_lst))
+        self.ends = np.cumsum(lengths)
+        self.starts = self.ends - lengths
+
+        # The codes of the joined binary sequences are only kept during the parsing.
+        codes = np.frombuffer("".join(binary_lst).encode(), dtype=np.uint8)
+        bits = (codes == ord("1")).view(np.uint8)
+        marks = codes == ord("x")
+        del codes
+
+        # Each mark slot is checked for the binary sequences whose previous slots are all marks.
+        self.depths = np.ones(len(binary_lst), dtype=np.int64)
+        rows = np.flatnonzero(lengths >= first_idx_length + 4)
+        position = first_idx_length
+        while len(rows) > 0:
+            slots = self.starts[rows][:, None] + position + np.arange(4)
+            rows = rows[np.all(marks[slots], axis=1)]
+            self.depths[rows] += 1
+            position += next_idx_length
+            rows = rows[lengths[rows] >= position + 4]
+        del marks
+
+        self.data_starts = np.minimum(self.starts + first_idx_length + (self.depths - 1) * next_idx_length, self.ends)
+
+        self.keys = np.zeros((len(binary_lst), int(self.depths.max()) if len(binary_lst) > 0 else 0), dtype=np.int64)
+        rows = np.flatnonzero(lengths >= first_idx_length)
+        self.keys[rows, 0] = self._values(bits, self.starts[rows], first_idx_length)
+        for row in np.flatnonzero((lengths > 0) & (lengths < first_idx_length)):
+            # The binary sequence is shorter than the prime index.
+            self.keys[row, 0] = int(binary_lst[row], 2)
+        for level in range(1, self.keys.shape[1]):
+            rows = np.flatnonzero(self.depths > level)
+            position = first_idx_length + (level - 1) * next_idx_length + 4
+            self.keys[rows, level] = self._values(bits, self.starts[rows] + position, next_idx_length - 4)
+
+        self.bits = np.packbits(bits)
+
+        self.first_idx_length = first_idx_length
+        self.next_idx_length = next_idx_length
+
+    def __len__(self):
+        return len(self.starts)
+
+    def index(self, row):
+        """
+        Get the index levels of a binary sequence. For example, [20, 1, 2].
+        """
+        return self.keys[row, :self.depths[row]].tolist()
+
+    def index_binary(self, row):
+        """
+        Get the binary index of a binary sequence, the marks are restored at the minor index slots.
+        """
+        characters = self._characters(self.starts[row], self.data_starts[row])
+        for level in range(1, self.depths[row]):
+            position = self.first_idx_length + (level - 1) * self.next_idx_length
+            characters[position: position + 4] = b"xxxx"
+
+        return characters.decode()
+
+    def data(self, row):
+        """
+        Get the data of a binary sequence.
+        """
+        return self._characters(self.data_starts[row], self.ends[row]).decode()
+
+    def sequence(self, row):
+        """
+        Get the binary sequence, the binary index plus the data.
+        """
+        return self.index_binary(row) + self.data(row)
+
+    def text(self):
+        """
+        Get the joined binary sequences as one string, in which the marks are restored at the minor index slots.
+        It is built for the bulk slicing by starts, data_starts and ends, and should not be kept.
+        """
+        codes = np.unpackbits(self.bits, count=int(self.ends[-1]) if len(self) > 0 else 0) + np.uint8(ord("0"))
+        for level in range(1, self.keys.shape[1]):
+            rows = np.flatnonzero(self.depths > level)
+            position = self.first_idx_length + (level - 1) * self.next_idx_length
+            codes[self.starts[rows][:, None] + position + np.arange(4)] = ord("x")
+
+        return codes.tobytes().decode()
+
+    def pack_data(self, lengths, block_size=65536):
+        """
+        Pack the last bits of the data of each row into bytes, in the order of rows.
+        The rows are unpacked block by block, and the bits left after the whole bytes are carried to the next block.
+
+        :param lengths: the number of the last bits of the data of each row.
+        :type: list(int)
+
+        :param block_size: the number of rows unpacked together.
+        :type: int
+
+        :return: the packed bytes (the last byte is padded with 0) and the number of the packed bits.
+        """
+        lengths = np.array(lengths, dtype=np.int64).reshape(len(self))
+
+        packed, carry, total = [], np.zeros(0, dtype=np.uint8), 0
+        for start in range(0, len(self), block_size):
+            stop = min(start + block_size, len(self))
+            offset = self.starts[start]
+            bits = self._unpack(offset, self.ends[stop - 1])
+
+            # The kept ranges are marked by the cumulative sum of their boundaries.
+            boundaries = np.bincount(self.ends[start: stop] - lengths[start: stop] - offset, minlength=len(bits) + 1) \
+                - np.bincount(self.ends[start: stop] - offset, minlength=len(bits) + 1)
+            bits = np.concatenate([carry, bits[np.cumsum(boundaries[:len(bits)]) > 0]])
+
+            total += len(bits) - len(carry)
+            packed.append(np.packbits(bits[: len(bits) // 8 * 8]).tobytes())
+            carry = bits[len(bits) // 8 * 8:]
+        packed.append(np.packbits(carry).tobytes())
+
+        return b"".join(packed), total
+
+    def _unpack(self, start, stop):
+        """
+        Unpack the bits in [start, stop) of the joined binary sequences.
+        """
+        return np.unpackbits(self.bits[start // 8: (stop + 7) // 8])[start % 8: start % 8 + stop - start]
+
+    def _characters(self, start, stop):
+        """
+        Get the bits in [start, stop) of the joined binary sequences as the characters '0' and '1'.
+        """
+        return bytearray((self._unpack(start, stop) + ord("0")).tobytes())
+
+    @staticmethod
+    def _values(bits, starts, length):
+        weights = np.left_shift(1, np.arange(length - 1, -1, -1, dtype=np.int64))
+        return bits[starts[:, None] + np.arange(length)].astype(np.int64) @ weights
 
 
 # noinspection PyProtectedMember
-def sort_order_version(indexs, datas, indexs_binary, need_log=False):
+def sort_order_version(indexs, datas=None, indexs_binary=None, need_log=False):
     """
     Restore data in order of index.
 
     :param indexes: the indexes of datas. For example, 20-1-2.
-    :type: list
+                    If it is the VersionIndexes from parse_all_version, the datas and the binary indexes are in it.
+    :type: list or numpy.ndarray or VersionIndexes
 
     :param datas: the disordered datas, the locations of these are corresponding to parameter "index".
 
@@ -146,15 +389,16 @@ def sort_order_version(indexs, datas, indexs_binary, need_log=False):
         log.output(log.NORMAL, str(__name__), str(sys._getframe().f_code.co_name),
                    "Restore data order according to index.")
 
-    max_idx_num = max(len(x) for x in indexs)
-    fill_indexs = list(map(lambda x:x+[0]*(max_idx_num-len(x)), indexs))
-    sort_indexs = sorted(fill_indexs, key=lambda x: ([x[i] for i in range(max_idx_num)]))
-    sort_datas = []
-    sort_indexs_datas = []
-    for index in sort_indexs:
-        idx = fill_indexs.index(index)
-        sort_datas.append(datas[idx])
-        sort_indexs_datas.append(indexs_binary[idx] + datas[idx])
+    if isinstance(indexs, VersionIndexes):
+        order = index_order(indexs.keys).tolist()
+        buffer, starts, data_starts, ends = \
+            indexs.text(), indexs.starts.tolist(), indexs.data_starts.tolist(), indexs.ends.tolist()
+        sort_datas = [buffer[data_starts[idx]: ends[idx]] for idx in order]
+        sort_indexs_datas = [buffer[starts[idx]: ends[idx]] for idx in order]
+    else:
+        order = index_order(indexs).tolist()
+        sort_datas = [datas[idx] for idx in order]
+        sort_indexs_datas = [indexs_binary[idx] + datas[idx] for idx in order]
 
     m.restore()
     del indexs, datas, indexs_binary, m
@@ -162,6 +406,472 @@ def sort_order_version(indexs, datas, indexs_binary, need_log=False):
     return sort_datas, sort_indexs_datas
 
 
+def pack_index_keys(indexs):
+    """
+    Pack the multi-level indexes into a fixed-width key matrix, the missing levels are filled with 0.
+
+    :param indexs: the indexes of datas. For example, 20-1-2.
+    :type: list
+
+    :return: the key matrix, one row for each index.
+    """
+    depths = np.fromiter(map(len, indexs), dtype=np.int64, count=len(indexs))
+    values = np.fromiter(itertools.chain.from_iterable(indexs), dtype=np.int64, count=int(depths.sum()))
+    keys = np.zeros((len(indexs), int(depths.max()) if len(indexs) > 0 else 0), dtype=np.int64)
+
+    rows = np.repeat(np.arange(len(indexs)), depths)
+    levels = np.arange(len(values)) - np.repeat(np.cumsum(depths) - depths, depths)
+    keys[rows, levels] = values
+
+    return keys
+
+
+def index_order(indexs):
+    """
+    Get the row order of the indexes, sorted by level from the prime index.
+    The sort is stable, so the rows with the same index keep their order.
+
+    :param indexs: the indexes of datas, or the key matrix from pack_index_keys.
+    :type: list or numpy.ndarray
+
+    :return: the order of rows.
+    """
+    keys = indexs if isinstance(indexs, np.ndarray) else pack_index_keys(indexs)
+    if keys.shape[1] == 0:
+        return np.arange(len(keys))
+
+    # If all the levels fit in one 63-bit integer, pack them and sort the integers.
+    widths = [int(level.max()).bit_length() for level in keys.T]
+    if sum(widths) <= 63:
+        packed = np.zeros(len(keys), dtype=np.int64)
+        for level, width in zip(keys.T, widths):
+            packed <<= width
+            packed |= level
+        return np.argsort(packed, kind="stable")
+
+    # The last key of lexsort is the primary one.
+    return np.lexsort(keys.T[::-1])
+
+
+def pair_partners(order):
+    """
+    Get the partner of each row in the order, the two binary sequences of a DNA sequence are decoded as
+    the rows 2k and 2k + 1.
+
+    :param order: the order of the decoded rows, such as the one from index_order.
+    :type: numpy.ndarray
+
+    :return: the position of the partner of each row in the order, -1 means that the row has no partner.
+    """
+    order = np.asarray(order, dtype=np.int64)
+    positions = np.empty(len(order), dtype=np.int64)
+    positions[order] = np.arange(len(order))
+
+    partners = np.full(len(order), -1, dtype=np.int64)
+    rows = order ^ 1
+    paired = rows < len(order)
+    partners[paired] = positions[rows[paired]]
+
+    return partners.tolist()
+
+
+class _SortedValues:
+
+    def __init__(self, values=(), block_size=1024):
+        """
+        The sorted distinct values kept in blocks, the block is found by bisection in the max values of the blocks.
+        Adding or removing a value only moves the values of its block, so it takes O(log n + block_size) time
+        instead of O(n) for one sorted list.
+
+        :param values: the sorted distinct values.
+        :type: iterable(int)
+
+        :param block_size: the number of values in a block, a block is split when it has twice of them.
+        :type: int
+        """
+        values = list(values)
+        self.block_size = block_size
+        self.blocks = [values[start: start + block_size] for start in range(0, len(values), block_size)]
+        self.maxes = [block[-1] for block in self.blocks]
+        self.count = len(values)
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return itertools.chain.from_iterable(self.blocks)
+
+    def __contains__(self, value):
+        block = bisect.bisect_left(self.maxes, value)
+        if block == len(self.maxes):
+            return False
+
+        values = self.blocks[block]
+        return values[bisect.bisect_left(values, value)] == value
+
+    def add(self, value):
+        """
+        Add the value if it is not included.
+
+        :param value: the added value.
+        :type: int
+        """
+        if self.count == 0:
+            self.blocks, self.maxes, self.count = [[value]], [value], 1
+            return
+
+        block = min(bisect.bisect_left(self.maxes, value), len(self.maxes) - 1)
+        values = self.blocks[block]
+        position = bisect.bisect_left(values, value)
+        if position < len(values) and values[position] == value:
+            return
+
+        values.insert(position, value)
+        self.maxes[block] = values[-1]
+        self.count += 1
+        if len(values) >= 2 * self.block_size:
+            self.blocks[block: block + 1] = [values[: self.block_size], values[self.block_size:]]
+            self.maxes[block: block + 1] = [values[self.block_size - 1], values[-1]]
+
+    def discard(self, value):
+        """
+        Remove the value if it is included.
+
+        :param value: the removed value.
+        :type: int
+        """
+        block = bisect.bisect_left(self.maxes, value)
+        if block == len(self.maxes):
+            return
+
+        values = self.blocks[block]
+        position = bisect.bisect_left(values, value)
+        if values[position] != value:
+            return
+
+        del values[position]
+        self.count -= 1
+        if len(values) > 0:
+            self.maxes[block] = values[-1]
+        else:
+            del self.blocks[block]
+            del self.maxes[block]
+
+    def next_value(self, value):
+        """
+        Get the smallest included value that is larger than the value.
+
+        :param value: the compared value.
+        :type: int
+
+        :return: the next value, or None if no value is larger.
+        """
+        block = bisect.bisect_right(self.maxes, value)
+        if block == len(self.maxes):
+            return None
+
+        values = self.blocks[block]
+        return values[bisect.bisect_right(values, value)]
+
+
+class VersionIndexTree:
+
+    def __init__(self, version_indexes=None, first_idx_length=20, next_idx_length=14):
+        """
+        The tree of the used indexes, each node keeps the sorted values of its children in the blocks of
+        _SortedValues, so that the rows superseded and created by the modifications are updated in O(log n) time.
+        For example, the indexes 20 and 20-1-2 make the nodes () -> [20], (20,) -> [1] and (20, 1) -> [2],
+        and 20-1 is kept in prefix_only because it is not an index of any binary sequence.
+        The free gap after an index is found by bisection in the children of its parent.
+
+        :param version_indexes: the parsed indexes from parse_all_version.
+        :type: VersionIndexes
+
+        :param first_idx_length: the length of the prime index.
+        :type: int
+
+        :param next_idx_length: the total length of the minor index.
+        :type: int
+        """
+        self.first_idx_length = first_idx_length
+        self.next_idx_length = next_idx_length
+        self.children = {}
+        self.prefix_only = set()
+
+        if version_indexes is not None and len(version_indexes) > 0:
+            self.children[()] = _SortedValues(np.unique(version_indexes.keys[version_indexes.depths == 1, 0]).tolist())
+            for row in np.flatnonzero(version_indexes.depths > 1):
+                self.add(version_indexes.index(row))
+
+    def __contains__(self, index):
+        return index[-1] in self.children.get(tuple(index[:-1]), ())
+
+    def limit(self, level):
+        """
+        Get the max value of the index level.
+
+        :param level: the index level, 0 means the prime index.
+        :type: int
+        """
+        if level == 0:
+            return pow(2, self.first_idx_length) - 1
+
+        return pow(2, self.next_idx_length - 4) - 1
+
+    def add(self, index):
+        """
+        Add the index and its prefixes to the tree.
+
+        :param index: the index levels. For example, [20, 1, 2].
+        :type: list
+        """
+        for level in range(len(index)):
+            values = self.children.setdefault(tuple(index[:level]), _SortedValues())
+            if index[level] not in values:
+                values.add(index[level])
+                if level < len(index) - 1:
+                    self.prefix_only.add(tuple(index[:level + 1]))
+
+        self.prefix_only.discard(tuple(index))
+
+    def discard(self, index):
+        """
+        Remove the index from the tree, and remove its prefixes that are not used anymore.
+
+        :param index: the index levels. For example, [20, 1, 2].
+        :type: list
+        """
+        node = tuple(index)
+        while len(node) > 0:
+            if len(self.children.get(node, ())) > 0:
+                # The index is still the prefix of other indexes.
+                self.prefix_only.add(node)
+                break
+
+            self.children.pop(node, None)
+            self.prefix_only.discard(node)
+            if node[:-1] in self.children:
+                self.children[node[:-1]].discard(node[-1])
+
+            node = node[:-1]
+            if node not in self.prefix_only:
+                break
+
+    def free_slots(self, index):
+        """
+        Get the number of free values directly after the index at its level.
+
+        :param index: the index levels. For example, [20, 1, 2].
+        :type: list
+        """
+        next_value = None
+        if tuple(index[:-1]) in self.children:
+            next_value = self.children[tuple(index[:-1])].next_value(index[-1])
+        if next_value is not None:
+            return next_value - index[-1] - 1
+
+        return self.limit(len(index) - 1) - index[-1]
+
+    # noinspection PyProtectedMember
+    def allocate(self, parent, count, after=None):
+        """
+        Allocate the indexes of count binary sequences, which are located directly after the child "after" of
+        the parent in the order of indexes. The tree is not changed, the indexes should be added after they are used.
+        If the free values after the child are enough, they are allocated at the level of the child.
+        Otherwise it descends a level: the child itself (if it has no children) and the free values are the prefixes,
+        and the indexes are allocated below them, one more level is descended until they are enough.
+        The indexes are allocated at the end of the free space, so the space directly after the child is kept for
+        the later allocations after the same child.
+
+        :param parent: the index levels of the parent. For example, [20, 1].
+        :type: list
+
+        :param count: the number of the allocated indexes.
+        :type: int
+
+        :param after: the value of the child, None means before all the children of the parent.
+        :type: int
+
+        :return: the allocated indexes in order. For example, [[20, 1, 3], [20, 1, 4]].
+        """
+        parent, node = list(parent), tuple(parent)
+        values = self.children.get(node, _SortedValues())
+        if after is not None:
+            if len(self.children.get(node + (after,), ())) > 0:
+                # The children of the child are located directly after it.
+                return self.allocate(parent + [after], count)
+            start, prefixes = after, [after]
+        elif len(parent) > 0:
+            if 0 in values:
+                return self.allocate(parent + [0], count)
+            # The index ending with 0 has the same key as its parent, so the minor index 0 is only a prefix.
+            start, prefixes = 0, [0]
+        else:
+            start, prefixes = -1, []
+
+        next_value = values.next_value(start)
+        free = range(start + 1, next_value if next_value is not None else self.limit(len(parent)) + 1)
+        if count <= len(free):
+            return [parent + [value] for value in free[len(free) - count:]]
+
+        if len(prefixes) + len(free) == 0:
+            if next_value is not None and node + (next_value,) in self.prefix_only:
+                # The first child is only a prefix, so the indexes can be allocated before its children.
+                return self.allocate(parent + [next_value], count)
+            log.output(log.ERROR, str(__name__), str(sys._getframe().f_code.co_name),
+                       "There is no free index after " + str(parent + [after] if after is not None else parent) + "!")
+
+        limit, depth = self.limit(len(parent) + 1), 1
+        while (len(prefixes) + len(free)) * pow(limit, depth) < count:
+            depth += 1
+
+        indexes, size = [], pow(limit, depth)
+        for position in range((len(prefixes) + len(free)) * size - count, (len(prefixes) + len(free)) * size):
+            prefix, remainder = divmod(position, size)
+            index = parent + [prefixes[prefix] if prefix < len(prefixes) else free[prefix - len(prefixes)]]
+            for level in range(depth - 1, -1, -1):
+                index.append(remainder // pow(limit, level) + 1)
+                remainder %= pow(limit, level)
+            indexes.append(index)
+
+        return indexes
+
+    # noinspection PyProtectedMember
+    def save(self, dna_path):
+        """
+        Save the tree as the sidecar of the DNA file, it is valid until the DNA file is changed.
+
+        :param dna_path: the path of the DNA file.
+        :type: string
+        """
+        information = os.stat(dna_path)
+        try:
+            with open(dna_path + ".tree", "wb") as file:
+                pickle.dump({"size": information.st_size, "mtime": information.st_mtime_ns,
+                             "first": self.first_idx_length, "next": self.next_idx_length,
+                             "children": {node: list(values) for node, values in self.children.items()},
+                             "prefix only": self.prefix_only}, file)
+        except IOError:
+            log.output(log.WARN, str(__name__), str(sys._getframe().f_code.co_name),
+                       "The index tree cannot be saved to " + dna_path + ".tree.")
+
+    @staticmethod
+    def load(dna_path, first_idx_length=20, next_idx_length=14):
+        """
+        Load the tree from the sidecar of the DNA file.
+
+        :param dna_path: the path of the DNA file.
+        :type: string
+
+        :param first_idx_length: the length of the prime index.
+        :type: int
+
+        :param next_idx_length: the total length of the minor index.
+        :type: int
+
+        :return: the tree, or None if the sidecar is missing or out of date.
+        """
+        try:
+            information = os.stat(dna_path)
+            with open(dna_path + ".tree", "rb") as file:
+                state = pickle.load(file)
+        except (IOError, pickle.UnpicklingError, EOFError):
+            return None
+
+        if (state.get("size"), state.get("mtime"), state.get("first"), state.get("next")) != \
+                (information.st_size, information.st_mtime_ns, first_idx_length, next_idx_length):
+            return None
+
+        tree = VersionIndexTree(None, first_idx_length, next_idx_length)
+        tree.children = {node: _SortedValues(values) for node, values in state["children"].items()}
+        tree.prefix_only = state["prefix only"]
+        return tree
+
+
+def find_packed(packed_data, pattern):
+    """
+    Find the first occurrence of the bytes in the packed bits at any bit offset.
+    The pattern is shifted instead of the packed bits: the whole bytes of each shifted pattern are found directly,
+    and its partial bytes at both boundaries are checked by the masks.
+
+    :param packed_data: the packed bytes and the number of the packed bits, such as the ones from
+                        VersionIndexes.pack_data.
+    :type: tuple
+
+    :param pattern: the bytes to find.
+    :type: bytes
+
+    :return: the bit offset of the first occurrence, -1 means that the bytes cannot be found.
+    """
+    data, length = packed_data
+    size = len(pattern)
+    if size == 0:
+        return 0
+
+    best = data.find(pattern)
+    if best < 0 or best + size > length // 8:
+        best = -1
+    else:
+        best *= 8
+
+    pattern_bits = np.unpackbits(np.frombuffer(pattern, dtype=np.uint8))
+    for shift in range(1, 8):
+        shifted = np.packbits(np.concatenate([np.zeros(shift, dtype=np.uint8), pattern_bits])).tobytes()
+        head_mask, tail_mask = 0xFF >> shift, (0xFF << (8 - shift)) & 0xFF
+        core = shifted[1: size]
+
+        position = data.find(core, 1)
+        while position >= 0:
+            offset = (position - 1) * 8 + shift
+            if offset + size * 8 > length or 0 <= best < offset:
+                break
+            if data[position - 1] & head_mask == shifted[0] and data[position - 1 + size] & tail_mask == shifted[size]:
+                best = offset
+                break
+            position = data.find(core, position + 1)
+
+    return best
+
+
+class PayloadOffsets:
+
+    def __init__(self, lengths):
+        """
+        The prefix sums of the data lengths of the rows, for locating the bit offsets of the joined data.
+
+        :param lengths: the length of the data of each row.
+        :type: iterable(int)
+        """
+        self.ends = list(itertools.accumulate(lengths))
+
+    def __len__(self):
+        return len(self.ends)
+
+    def locate(self, bit_offset):
+        """
+        Locate the row that contains the bit offset, by bisection.
+
+        :param bit_offset: the bit offset in the joined data.
+        :type: int
+
+        :return: the row, and the bit offset in the data of the row.
+        """
+        row = bisect.bisect_right(self.ends, bit_offset)
+        return row, bit_offset - self.start(row)
+
+    def start(self, row):
+        """
+        Get the bit offset of the first bit of the row in the joined data.
+        """
+        return self.ends[row - 1] if row > 0 else 0
+
+    def end(self, row):
+        """
+        Get the bit offset after the last bit of the row in the joined data.
+        """
+        return self.ends[row]
+
+
 def multiple_index_sort(max_index_num, min_index_num, multiple_index):
 
     last_index_items = list(multiple_index.items())
@@ -22,32 +22,51 @@ from yyc.utils.monitor import Monitor
 # 1536: ["A", [1, 1, 0, 0], [[1, 0, 1, 0], [1, 0, 1, 0], [1, 0, 1, 0], [1, 0, 1, 0]]]
 
 
+# The table of all the available Yin-Yang rules, which is generated once.
+_yyc_rules = None
+
+
 def get_yyc_rules(need_log=False):
-    rules = []
-    temp_rule1 = ["".join(x) for x in itertools.product("01", repeat=4)]
-    temp_rule2 = ["".join(x) for x in itertools.product("01", repeat=16)]
+    """
+    introduction: Get all the available Yin and Yang rules of YYC.
+                  The rules are in the canonical order: support base in "ATCG", RULE 1 and RULE 2 in ascending binary.
+
+    :param need_log: Show the log.
 
-    m = Monitor()
+    :return: YYC rules.
+    """
+    global _yyc_rules
 
     if need_log:
         # noinspection PyProtectedMember
         log.output(log.NORMAL, str(__name__), str(sys._getframe().f_code.co_name),
                    "Find all the available Yin-Yang rules.")
 
-    count, step = 0, 0
-    for base in ["A", "T", "C", "G"]:
-        for rule1index in range(len(temp_rule1)):
-            for rule2index in range(len(temp_rule2)):
-                rule1 = list(map(int, list(temp_rule1[rule1index])))
-                rule2 = numpy.array(list(map(int, list(temp_rule2[rule2index])))).reshape(4, 4).tolist()
-                if _check(rule1, rule2):
-                    rules.append(YYCRule(rule1, rule2, base, count))
-                    count += 1
+    if _yyc_rules is None:
+        _yyc_rules = _generate_yyc_rules()
 
-                step += 1
+    if need_log:
+        Monitor().output(len(_yyc_rules), len(_yyc_rules))
 
-                if need_log:
-                    m.output(step, len(temp_rule1) * len(temp_rule2) * 4)
+    return list(_yyc_rules)
+
+
+def _generate_yyc_rules():
+    """
+    introduction: Generate the available Yin and Yang rules of YYC directly.
+                  For each RULE 1 with two 0 and two 1, every row of RULE 2 should assign different binary to
+                  the two bases with the same binary in RULE 1, so RULE 2 is the product of the available rows.
+
+    :return: YYC rules.
+    """
+    rules, count = [], 0
+    rule1s = [list(rule1) for rule1 in itertools.product([0, 1], repeat=4) if sum(rule1) == 2]
+    for base in ["A", "T", "C", "G"]:
+        for rule1 in rule1s:
+            rows = [list(row) for row in itertools.product([0, 1], repeat=4) if _check(rule1, [row])]
+            for rule2 in itertools.product(rows, repeat=4):
+                rules.append(YYCRule(rule1, [list(row) for row in rule2], base, count))
+                count += 1
 
     return rules
 
@@ -55,7 +74,7 @@ def get_yyc_rules(need_log=False):
 # noinspection PyProtectedMember
 def get_yyc_rule_by_index(index, need_log=False):
     """
-    introduction: Get Yin and Yang rule of YYC by index (1536 types of rules)
+    introduction: Get Yin and Yang rule of YYC by index (1536 types of rules for each support base)
 
     :param index: rule index.
 
@@ -63,17 +82,22 @@ def get_yyc_rule_by_index(index, need_log=False):
 
     :return: YYC rule with [self.support_base, self.rule1, self.rule2].
     """
-    rules = get_yyc_rules(need_log)
+    global _yyc_rules
+
+    if _yyc_rules is None:
+        _yyc_rules = _generate_yyc_rules()
 
-    if index < 0 or index >= len(rules):
+    if index < 0 or index >= len(_yyc_rules):
         log.output(log.ERROR, str(__name__), str(sys._getframe().f_code.co_name),
-                   "We have " + str(len(rules)) + " rules, index " + str(index) + " is wrong!")
+                   "We have " + str(len(_yyc_rules)) + " rules, index " + str(index) + " is wrong!")
 
     if need_log:
         log.output(log.NORMAL, str(__name__), str(sys._getframe().f_code.co_name),
-                   "Current Rule is " + str(rules[index].get_info()) + ".")
+                   "Current Rule is " + str(_yyc_rules[index].get_info()) + ".")
 
-    return rules[index].get_info()
+    rule = _yyc_rules[index]
+
+    return {"v": rule.support_base, "yang": list(rule.rule1), "yin": [list(row) for row in rule.rule2]}
 
 
 def _check(rule1, rule2):
@@ -119,32 +143,66 @@ class YYCRule:
         self.support_base = support_base
         self.identity = identity
 
+        # table[support code][upper bit][lower bit] is the code of the current base.
+        self.table = []
+        for support_code in range(4):
+            self.table.append([])
+            for upper_bit in range(2):
+                options = [index for index in range(len(self.rule1)) if self.rule1[index] == upper_bit]
+                self.table[support_code].append([options[0] if self.rule2[support_code][options[0]] == lower_bit
+                                                 else options[1] for lower_bit in range(2)])
+        self.flat_table = numpy.array(self.table, dtype=numpy.uint8).reshape(-1)
+
     def lists_to_motif(self, upper_list, lower_list):
-        motif = []
+        motif, support_code = [], self.b2i[self.support_base]
 
         for col in range(len(upper_list)):
-            if col > 0:
-                motif.append(self.__binary_to_base__(upper_list[col], lower_list[col], motif[col - 1]))
-            else:
-                motif.append(self.__binary_to_base__(upper_list[col], lower_list[col], self.support_base))
+            support_code = self.table[support_code][int(upper_list[col])][int(lower_list[col])]
+            motif.append(self.i2b[support_code])
         return motif
 
-    def __str__(self):
-        return "[" + self.support_base + ", " + str(self.rule1) + ", " + str(self.rule2) + "]"
+    def arrays_to_codes(self, upper_array, lower_array):
+        """
+        introduction: Convert the pairs of binary sequences with the same length to the base codes in batch.
 
-    def __binary_to_base__(self, upper_bit, lower_bit, support_base):
+        :param upper_array: N x L array of the upper bits.
+        :param lower_array: N x L array of the lower bits.
+
+        :return: N x L array of base codes (A = 0, C = 1, G = 2, T = 3).
+        """
+        pair_bits = (numpy.asarray(upper_array, dtype=numpy.uint8) * 2
+                     + numpy.asarray(lower_array, dtype=numpy.uint8)).T
+        codes = numpy.empty(pair_bits.shape, dtype=numpy.uint8)
+
+        support_codes = self.b2i[self.support_base]
+        for col in range(len(pair_bits)):
+            codes[col] = self.flat_table[support_codes * 4 + pair_bits[col]]
+            support_codes = codes[col]
+
+        return codes.T
 
-        current_options = []
-        for index in range(len(self.rule1)):
-            if self.rule1[index] == int(upper_bit):
-                current_options.append(index)
+    def lists_to_motifs(self, upper_lists, lower_lists):
+        """
+        introduction: Convert the pairs of binary sequences with the same length to DNA sequences in batch.
 
-        if self.rule2[self.b2i.get(support_base)][current_options[0]] == int(lower_bit):
-            one_base = self.i2b[current_options[0]]
-        else:
-            one_base = self.i2b[current_options[1]]
+        :param upper_lists: the upper binary sequences.
+        :param lower_lists: the lower binary sequences.
 
-        return one_base
+        :return: DNA sequences.
+        """
+        if len(upper_lists) == 0:
+            return []
+
+        codes = self.arrays_to_codes(upper_lists, lower_lists)
+        bases = numpy.array([ord(self.i2b[code]) for code in range(4)], dtype=numpy.uint8)[codes]
+
+        return [row.tobytes().decode() for row in bases]
+
+    def __str__(self):
+        return "[" + self.support_base + ", " + str(self.rule1) + ", " + str(self.rule2) + "]"
+
+    def __binary_to_base__(self, upper_bit, lower_bit, support_base):
+        return self.i2b[self.table[self.b2i.get(support_base)][int(upper_bit)][int(lower_bit)]]
 
     def get_info(self):
         return {"v": self.support_base, "yang": self.rule1, "yin": self.rule2}
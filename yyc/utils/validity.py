@@ -11,6 +11,21 @@ The validity describes the friendly index for DNA synthesis, sequencing and rela
 import re
 import subprocess
 import math
+import sys
+import threading
+import atexit
+import hashlib
+import sqlite3
+from collections import OrderedDict
+import numpy as np
+
+from yyc.utils import log
+
+# ASCII code of base to the base code (A = 0, C = 1, G = 2, T = 3), 255 means invalid base.
+_base_codes = np.full(256, 255, dtype=np.uint8)
+for _code, _base in enumerate("ACGT"):
+    _base_codes[ord(_base)] = _code
+_code_bases = np.array(list("ACGT"))
 
 
 def check(sequence, max_homopolymer=math.inf, max_content=1, min_free_energy=None):
@@ -49,8 +64,9 @@ def homopolymer(sequence, max_homopolymer):
     missing_segments = ["A" * (1 + max_homopolymer), "C" * (1 + max_homopolymer), "G" * (1 + max_homopolymer),
                         "T" * (1 + max_homopolymer)]
 
+    sequence = "".join(sequence)
     for missing_segment in missing_segments:
-        if missing_segment in "".join(sequence):
+        if missing_segment in sequence:
             return False
     return True
 
@@ -79,14 +95,473 @@ def fold(motif, min_free_energy):
     if min_free_energy is None:
         return True
 
-    process = subprocess.Popen('echo "%s" | RNAfold --noPS --noGU --noconv -T 59.1' % motif,
-                               stdout=subprocess.PIPE, shell=True)
-    process.wait()
-    if process.returncode == 0:
-        line = process.stdout.read().decode().split('\n')[1]
-        m = re.search("(\S+)\s+\(\s*(\S+)\)", line)
-        if m:
-            if min_free_energy > float(m.group(2)):
-                return True
-
-    return False
+    return batch_fold([motif], min_free_energy)[0]
+
+
+def batch_fold(motifs, min_free_energy):
+    """
+    Call the RNAfold worker pool to calculate hairpin MFE of motifs in batch.
+
+    :param motifs: requested DNA sequences.
+    :param min_free_energy: min free energy.
+
+    :return: whether the free energy of each DNA sequence is lower than required min free energy.
+    """
+    if min_free_energy is None:
+        return [True] * len(motifs)
+
+    return [energy is not None and min_free_energy > energy for energy in free_energies(motifs)]
+
+
+def free_energies(motifs):
+    """
+    Calculate hairpin MFE of motifs, only the motifs missing in the fold cache are folded by the RNAfold worker pool.
+
+    :param motifs: requested DNA sequences.
+
+    :return: the free energy of each DNA sequence, None means the free energy is not available.
+    """
+    motifs = ["".join(motif) for motif in motifs]
+    pool, cache = get_fold_pool(), get_fold_cache()
+    if cache is None:
+        return pool.energies(motifs)
+
+    temperature = pool.temperature
+    results = [cache.get(motif, temperature) for motif in motifs]
+    missing_motifs = list(dict.fromkeys([motif for motif, energy in zip(motifs, results) if energy is None]))
+    if len(missing_motifs) > 0:
+        missing_energies = dict(zip(missing_motifs, pool.energies(missing_motifs)))
+        cache.put_all([(motif, temperature, energy) for motif, energy in missing_energies.items()
+                       if energy is not None])
+        results = [missing_energies[motif] if energy is None else energy for motif, energy in zip(motifs, results)]
+
+    return results
+
+
+class FoldWorker(object):
+
+    def __init__(self, executable="RNAfold", temperature=59.1):
+        """
+        Initialize a long-lived RNAfold process, which folds the sequences streamed over stdin.
+
+        :param executable: the RNAfold executable, or the compatible executable.
+        :param temperature: the temperature of folding.
+        """
+        self.executable = executable
+        self.temperature = temperature
+        self.process = None
+
+    def start(self):
+        """
+        Start the RNAfold process if it is not running.
+
+        :return: whether the RNAfold process is running.
+        """
+        if self.process is not None and self.process.poll() is None:
+            return True
+
+        try:
+            self.process = subprocess.Popen([self.executable, "--noPS", "--noGU", "--noconv",
+                                             "-T", str(self.temperature)],
+                                            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                            stderr=subprocess.DEVNULL, universal_newlines=True, bufsize=1)
+        except OSError:
+            self.process = None
+            return False
+
+        return True
+
+    def energies(self, motifs):
+        """
+        Fold the motifs in the RNAfold process.
+        The motifs are written by another thread, so that the pipes cannot be blocked by each other.
+
+        :param motifs: requested DNA sequences.
+
+        :return: the free energy of each DNA sequence, None means the free energy is not available.
+        """
+        motifs = ["".join(motif) for motif in motifs]
+        if len(motifs) == 0:
+            return []
+        if not self.start():
+            return [None] * len(motifs)
+
+        writer = threading.Thread(target=self._write, args=(motifs,), daemon=True)
+        writer.start()
+
+        results = []
+        for _ in motifs:
+            self.process.stdout.readline()
+            match = re.search(r"(\S+)\s+\(\s*(\S+)\)", self.process.stdout.readline())
+            results.append(float(match.group(2)) if match else None)
+
+        writer.join()
+
+        if None in results:
+            # The process may be broken, restart it in the next batch.
+            self.close()
+
+        return results
+
+    def close(self):
+        """
+        Close the RNAfold process.
+        """
+        if self.process is not None:
+            try:
+                self.process.stdin.close()
+            except OSError:
+                pass
+            if self.process.poll() is None:
+                self.process.kill()
+            self.process.wait()
+            self.process.stdout.close()
+            self.process = None
+
+    def _write(self, motifs):
+        try:
+            self.process.stdin.write("".join([motif + "\n" for motif in motifs]))
+            self.process.stdin.flush()
+        except OSError:
+            pass
+
+
+class FoldPool(object):
+
+    def __init__(self, workers=1, executable="RNAfold", temperature=59.1):
+        """
+        Initialize the pool of RNAfold worker processes.
+
+        :param workers: the number of RNAfold worker processes.
+        :param executable: the RNAfold executable, or the compatible executable.
+        :param temperature: the temperature of folding.
+        """
+        if workers < 1:
+            log.output(log.ERROR, str(__name__), str(sys._getframe().f_code.co_name),
+                       "The number of fold workers should be at least 1!")
+
+        self.temperature = temperature
+        self.workers = [FoldWorker(executable, temperature) for _ in range(workers)]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def energies(self, motifs):
+        """
+        Shard the motifs across the RNAfold worker processes.
+
+        :param motifs: requested DNA sequences.
+
+        :return: the free energy of each DNA sequence in order, None means the free energy is not available.
+        """
+        motifs = list(motifs)
+        if len(self.workers) == 1 or len(motifs) <= 1:
+            return self.workers[0].energies(motifs)
+
+        shard_size = math.ceil(len(motifs) / len(self.workers))
+        threads, results = [], [None] * len(self.workers)
+
+        def task(index):
+            results[index] = self.workers[index].energies(motifs[index * shard_size: (index + 1) * shard_size])
+
+        for index in range(len(self.workers)):
+            threads.append(threading.Thread(target=task, args=(index,), daemon=True))
+            threads[-1].start()
+        for thread in threads:
+            thread.join()
+
+        return [energy for result in results for energy in result]
+
+    def close(self):
+        """
+        Close all the RNAfold worker processes.
+        """
+        for worker in self.workers:
+            worker.close()
+
+
+class FoldCache(object):
+
+    def __init__(self, capacity=65536, path=None):
+        """
+        Initialize the cache of free energies, keyed by DNA sequence and temperature.
+        The recently used free energies are kept in memory, and all the free energies are kept in the sqlite database
+        if the path is given, so that they can be reused by the next run.
+
+        :param capacity: the max number of free energies kept in memory.
+        :param path: the path of sqlite database, None means the cache is in memory only.
+        """
+        self.capacity = capacity
+        self.path = path
+        self.memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        self.database = None
+        if path is not None:
+            self.database = sqlite3.connect(path, check_same_thread=False)
+            self.database.execute("CREATE TABLE IF NOT EXISTS energies "
+                                  "(digest TEXT, temperature REAL, energy REAL, PRIMARY KEY (digest, temperature))")
+            self.database.commit()
+
+    def __len__(self):
+        return len(self.memory)
+
+    def get(self, motif, temperature):
+        """
+        Get the free energy of DNA sequence in the cache.
+
+        :param motif: requested DNA sequence.
+        :param temperature: the temperature of folding.
+
+        :return: the free energy, None means the DNA sequence is not cached.
+        """
+        key = (motif, temperature)
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            self.hits += 1
+            return self.memory[key]
+
+        if self.database is not None:
+            row = self.database.execute("SELECT energy FROM energies WHERE digest = ? AND temperature = ?",
+                                        (self._digest(motif), temperature)).fetchone()
+            if row is not None:
+                self._remember(key, row[0])
+                self.hits += 1
+                return row[0]
+
+        self.misses += 1
+        return None
+
+    def put_all(self, records):
+        """
+        Put the free energies of DNA sequences into the cache.
+
+        :param records: the DNA sequences, the temperatures of folding, and the free energies.
+        :type: list(tuple)
+        """
+        for motif, temperature, energy in records:
+            self._remember((motif, temperature), energy)
+
+        if self.database is not None:
+            self.database.executemany("INSERT OR REPLACE INTO energies VALUES (?, ?, ?)",
+                                      [(self._digest(motif), temperature, energy)
+                                       for motif, temperature, energy in records])
+            self.database.commit()
+
+    def statistics(self):
+        """
+        Get the hit and miss counters of the cache.
+
+        :return: the counters of the cache.
+        """
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit rate": self.hits / total if total > 0 else 0.0,
+                "memory size": len(self.memory)}
+
+    def close(self):
+        """
+        Close the sqlite database.
+        """
+        if self.database is not None:
+            self.database.close()
+            self.database = None
+
+    def _remember(self, key, energy):
+        self.memory[key] = energy
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.capacity:
+            self.memory.popitem(last=False)
+
+    @staticmethod
+    def _digest(motif):
+        return hashlib.sha1(motif.encode()).hexdigest()
+
+
+_fold_pool = None
+_fold_cache = FoldCache()
+
+
+@atexit.register
+def _close_fold_pool():
+    if _fold_pool is not None:
+        _fold_pool.close()
+    if _fold_cache is not None:
+        _fold_cache.close()
+
+
+def set_fold_pool(workers=1, executable="RNAfold", temperature=59.1):
+    """
+    Replace the RNAfold worker pool used by fold and batch_fold.
+
+    :param workers: the number of RNAfold worker processes.
+    :param executable: the RNAfold executable, or the compatible executable.
+    :param temperature: the temperature of folding.
+
+    :return: the new RNAfold worker pool.
+    """
+    global _fold_pool
+    if _fold_pool is not None:
+        _fold_pool.close()
+    _fold_pool = FoldPool(workers, executable, temperature)
+
+    return _fold_pool
+
+
+def get_fold_pool():
+    """
+    Get the RNAfold worker pool used by fold and batch_fold, a single worker pool is created by default.
+
+    :return: the RNAfold worker pool.
+    """
+    if _fold_pool is None:
+        set_fold_pool()
+
+    return _fold_pool
+
+
+def set_fold_cache(capacity=65536, path=None):
+    """
+    Replace the cache of free energies used by fold and batch_fold.
+
+    :param capacity: the max number of free energies kept in memory, 0 means the cache is disabled.
+    :param path: the path of sqlite database, None means the cache is in memory only.
+
+    :return: the new cache of free energies.
+    """
+    global _fold_cache
+    if _fold_cache is not None:
+        _fold_cache.close()
+    _fold_cache = FoldCache(capacity, path) if capacity > 0 else None
+
+    return _fold_cache
+
+
+def get_fold_cache():
+    """
+    Get the cache of free energies used by fold and batch_fold.
+
+    :return: the cache of free energies, None means the cache is disabled.
+    """
+    return _fold_cache
+
+
+def to_codes(sequences):
+    """
+    Convert DNA sequences with the same length to the array of base codes (A = 0, C = 1, G = 2, T = 3).
+
+    :param sequences: requested DNA sequences, or the array of base codes.
+
+    :return: N x L array of base codes.
+    """
+    if isinstance(sequences, np.ndarray):
+        return sequences.astype(np.uint8, copy=False)
+
+    sequences = [sequence if isinstance(sequence, str) else "".join(sequence) for sequence in sequences]
+    if len(sequences) == 0:
+        return np.zeros((0, 0), dtype=np.uint8)
+
+    if len(set(map(len, sequences))) > 1:
+        log.output(log.ERROR, str(__name__), str(sys._getframe().f_code.co_name),
+                   "The DNA sequences in batch should have the same length!")
+
+    codes = _base_codes[np.frombuffer("".join(sequences).encode(), dtype=np.uint8)].reshape(len(sequences), -1)
+    if np.any(codes == 255):
+        log.output(log.ERROR, str(__name__), str(sys._getframe().f_code.co_name),
+                   "Only A, T, C, and G can be included in the DNA sequences!")
+
+    return codes
+
+
+def batch_cg_contents(codes):
+    """
+    Calculate the C and G content of each DNA sequence in batch.
+
+    :param codes: N x L array of base codes, or the DNA sequences with the same length.
+
+    :return: the C and G content of each DNA sequence.
+    """
+    codes = to_codes(codes)
+    if codes.shape[1] == 0:
+        return np.zeros(len(codes), dtype=float)
+
+    return np.count_nonzero((codes == 1) | (codes == 2), axis=1) / float(codes.shape[1])
+
+
+def batch_max_runs(codes):
+    """
+    Calculate the max homopolymer length of each DNA sequence in batch.
+    The start position of the run covering each position is carried forward by the cumulative maximum,
+    so the run length of each position is the distance to the start position plus one.
+
+    :param codes: N x L array of base codes, or the DNA sequences with the same length.
+
+    :return: the max homopolymer length of each DNA sequence.
+    """
+    codes = to_codes(codes)
+    if codes.shape[1] == 0:
+        return np.zeros(len(codes), dtype=int)
+
+    positions = np.arange(codes.shape[1])
+    run_starts = np.zeros(codes.shape, dtype=int)
+    run_starts[:, 1:] = np.where(codes[:, 1:] != codes[:, :-1], positions[1:], 0)
+    np.maximum.accumulate(run_starts, axis=1, out=run_starts)
+
+    return (positions - run_starts).max(axis=1) + 1
+
+
+def batch_check(codes, max_homopolymer=math.inf, max_content=1, min_free_energy=None):
+    """
+    Check the validity of DNA sequences in batch.
+
+    :param codes: N x L array of base codes, or the DNA sequences with the same length.
+    :param max_homopolymer: maximum length of homopolymer.
+    :param max_content: maximum content of C and G, which means GC content is in [1 - max_content, max_content].
+    :param min_free_energy: the free energy of DNA sequence is lower than required min free energy.
+
+    :return: valid mask, homopolymer mask, C and G content mask, C and G contents and max homopolymer lengths.
+    """
+    codes = to_codes(codes)
+    cg_contents = batch_cg_contents(codes)
+    max_runs = batch_max_runs(codes)
+
+    homopolymer_mask = max_runs <= max_homopolymer
+    content_mask = ((1 - max_content) <= cg_contents) & (cg_contents <= max_content)
+    valid_mask = homopolymer_mask & content_mask
+
+    if min_free_energy is not None:
+        rows = np.flatnonzero(valid_mask)
+        valid_mask[rows] = batch_fold(["".join(_code_bases[codes[row]]) for row in rows], min_free_energy)
+
+    return valid_mask, homopolymer_mask, content_mask, cg_contents, max_runs
+
+
+def pool_summary(codes, max_homopolymer=math.inf, max_content=1, bins=20):
+    """
+    Summarize the quality of DNA sequence pool, for DNA synthesis.
+
+    :param codes: N x L array of base codes, or the DNA sequences with the same length.
+    :param max_homopolymer: maximum length of homopolymer.
+    :param max_content: maximum content of C and G, which means GC content is in [1 - max_content, max_content].
+    :param bins: the number of bins in the C and G content histogram.
+
+    :return: the quality summary of the DNA sequence pool.
+    """
+    valid_mask, homopolymer_mask, content_mask, cg_contents, max_runs = batch_check(codes, max_homopolymer,
+                                                                                     max_content)
+    gc_counts, gc_edges = np.histogram(cg_contents, bins=bins, range=(0, 1))
+    run_lengths, run_counts = np.unique(max_runs, return_counts=True)
+
+    return {
+        "sequence count": len(cg_contents),
+        "valid count": int(np.count_nonzero(valid_mask)),
+        "homopolymer failures": int(np.count_nonzero(~homopolymer_mask)),
+        "cg content failures": int(np.count_nonzero(~content_mask)),
+        "cg content mean": float(cg_contents.mean()) if len(cg_contents) > 0 else 0.0,
+        "cg content histogram": list(zip(gc_edges[:-1].tolist(), gc_edges[1:].tolist(), gc_counts.tolist())),
+        "homopolymer distribution": dict(zip(run_lengths.tolist(), run_counts.tolist()))
+    }
+